@@ -4,17 +4,35 @@ import time
 import streamlit as st
 from data.news_calendar import get_high_impact_news
 
+SEND_MESSAGE_URL = "https://api.telegram.org/bot{token}/sendMessage"
+
+# Reused across alerts so a burst of signals shares one TLS connection.
+# No automatic retries: a resent sendMessage would duplicate the alert.
+_HTTP = requests.Session()
+
+# Secrets don't change while the app runs; found values are memoized so every
+# alert doesn't go back through st.secrets + os.getenv. Misses aren't cached,
+# so a secret added after startup is picked up on the next alert.
+_SECRETS = {}
+
 def _get_secret(name: str):
+    v = _SECRETS.get(name)
+    if v:
+        return v
     # Streamlit Cloud secrets first
     try:
         v = st.secrets.get(name)
         if v:
-            return str(v)
+            _SECRETS[name] = str(v)
+            return _SECRETS[name]
     except Exception:
         pass
     # Fallback: environment variables (local)
     v = os.getenv(name)
-    return v if v else None
+    if v:
+        _SECRETS[name] = v
+        return v
+    return None
 
 def send_telegram_message(text: str) -> bool:
     token = _get_secret("TELEGRAM_BOT_TOKEN")
@@ -23,11 +41,10 @@ def send_telegram_message(text: str) -> bool:
     if not token or not chat_id:
         return False
 
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
     payload = {"chat_id": chat_id, "text": text}  # plain text
 
     try:
-        r = requests.post(url, json=payload, timeout=10)
+        r = _HTTP.post(SEND_MESSAGE_URL.format(token=token), json=payload, timeout=10)
         return r.status_code == 200
     except Exception:
         return False
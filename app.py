@@ -1,11 +1,14 @@
 # force redeploy
+import functools
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
 
 sys.path.append(str(Path(__file__).parent))
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
@@ -14,26 +17,20 @@ from components.ai_commentary import render_ai_commentary
 from components.asset_detail import render_asset_detail
 from components.asset_table import render_asset_table
 from components.portfolio_panel import render_portfolio_panel
-from components.top_bar import render_top_bar
-from data.live_data import fetch_ohlc
+from components.top_bar import render_top_bar, session_name
+from data.live_data import canonical_symbol, fetch_ohlc_timeframes
 from data.news_calendar import get_high_impact_news
 from engine.decision_layer import run_decisions
 from engine.fvg import compute_fvg_context
 from engine.portfolio import init_portfolio_state, update_portfolio
 from engine.profiles import get_profiles
+from engine.scoring import FIRE_ACTIONS
 from state.session_state import init_session_state
 
 
-def _normalize_symbol(symbol: str) -> str:
-    s = (symbol or "").upper().strip()
-    for sep in (".", "-", "_"):
-        if sep in s:
-            s = s.split(sep, 1)[0]
-    return s
-
-
+@functools.lru_cache(maxsize=256)
 def _price_decimals(symbol: str) -> int:
-    s = _normalize_symbol(symbol)
+    s = canonical_symbol(symbol)
     if s.endswith("JPY"):
         return 3
     if s in {"EURUSD", "GBPUSD", "AUDUSD", "NZDUSD", "USDCAD", "USDCHF"}:
@@ -52,6 +49,21 @@ def _round_price(value, symbol: str):
         return value
 
 
+def _last_bar_fields(df: pd.DataFrame, symbol: str) -> dict:
+    """
+    Last close/high/low as plain floats, so downstream readers (portfolio) don't index df.
+    Rounded to the symbol's quote decimals: cached candles are float32, which is
+    off by ~2e-3 on index prices, and these feed portfolio entry/stop/PnL.
+    """
+    if df.empty:
+        return {"last_close": None, "last_high": None, "last_low": None}
+    return {
+        "last_close": _round_price(df["close"].iat[-1], symbol),
+        "last_high": _round_price(df["high"].iat[-1], symbol),
+        "last_low": _round_price(df["low"].iat[-1], symbol),
+    }
+
+
 st.set_page_config(page_title="Trading Assistant", layout="wide", initial_sidebar_state="collapsed")
 
 # Clean minimal dark theme
@@ -116,7 +128,7 @@ def _alert_min_conf(decision) -> float:
       - CONTINUATION can alert at 6.5 (since it can execute at 6.5)
       - Everything else uses ALERT_CONFIDENCE_MIN (default 8.0)
     """
-    setup = str((getattr(decision, "meta", {}) or {}).get("setup_type", "")).upper()
+    setup = str((decision.meta or {}).get("setup_type", "")).upper()
     if setup == "CONTINUATION":
         return 6.5
     return float(ALERT_CONFIDENCE_MIN)
@@ -128,7 +140,7 @@ def maybe_send_trade_alerts(decisions):
     last_ts = st.session_state["last_alerted_ts"]
 
     for decision in decisions:
-        if decision.action not in ("BUY NOW", "SELL NOW"):
+        if decision.action not in FIRE_ACTIONS:
             continue
 
         min_conf = _alert_min_conf(decision)
@@ -159,22 +171,17 @@ def build_snapshot():
     symbols = [p.symbol for p in profiles]
     factors_by_symbol = {}
 
-    def atr(df, n=14):
-        high, low, close = df["high"], df["low"], df["close"]
-        tr = (high - low).to_frame("hl")
-        tr["hc"] = (high - close.shift()).abs()
-        tr["lc"] = (low - close.shift()).abs()
-        return tr.max(axis=1).rolling(n).mean()
-
-    def session_name(now_utc: datetime) -> str:
-        hour = now_utc.hour
-        if 12 <= hour < 16:
-            return "London + NY Overlap"
-        if 7 <= hour < 12:
-            return "London"
-        if 12 <= hour < 21:
-            return "New York"
-        return "Asia / Off-hours"
+    def last_atr(df, n=14) -> float:
+        # Only the latest ATR value is used, so average the last n true ranges
+        # from the tail arrays instead of rolling over the whole frame.
+        if len(df) < n:
+            return 0.0
+        high = df["high"].to_numpy(dtype="float64")[-n:]
+        low = df["low"].to_numpy(dtype="float64")[-n:]
+        close = df["close"].to_numpy(dtype="float64")[-(n + 1):]
+        prev_close = close[:-1] if len(close) > n else np.concatenate(([np.nan], close[:-1]))
+        tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+        return float(tr.mean())
 
     # ✅ Asia NOT stricter anymore
     def session_valid_flags(sess: str):
@@ -185,7 +192,7 @@ def build_snapshot():
 
     def current_4h_open(df_4h: pd.DataFrame, fallback_price: float) -> float:
         if df_4h is not None and not df_4h.empty and "open" in df_4h.columns:
-            return float(df_4h["open"].iloc[-1])
+            return float(df_4h["open"].iat[-1])
         return float(fallback_price)
 
     def compute_liquidity_targets(df_15m: pd.DataFrame):
@@ -209,16 +216,16 @@ def build_snapshot():
         mean_range = float(ranges.mean()) if not ranges.empty else 0.0
         if mean_range <= 0:
             return False
-        return float(ranges.iloc[-1]) <= (mean_range * 0.85)
+        return float(ranges.iat[-1]) <= (mean_range * 0.85)
 
     def detect_sweep(df_15m: pd.DataFrame):
         if df_15m is None or df_15m.empty or len(df_15m) < 40:
             return False, False
         prior_high = float(df_15m["high"].iloc[-35:-1].max())
         prior_low = float(df_15m["low"].iloc[-35:-1].min())
-        last_high = float(df_15m["high"].iloc[-1])
-        last_low = float(df_15m["low"].iloc[-1])
-        last_close = float(df_15m["close"].iloc[-1])
+        last_high = float(df_15m["high"].iat[-1])
+        last_low = float(df_15m["low"].iat[-1])
+        last_close = float(df_15m["close"].iat[-1])
         sweep_above = (last_high > prior_high) and (last_close < prior_high)
         sweep_below = (last_low < prior_low) and (last_close > prior_low)
         return sweep_above, sweep_below
@@ -228,9 +235,14 @@ def build_snapshot():
             return False, False
         swing_high = float(df_15m["high"].iloc[-22:-1].max())
         swing_low = float(df_15m["low"].iloc[-22:-1].min())
-        last_close = float(df_15m["close"].iloc[-1])
+        last_close = float(df_15m["close"].iat[-1])
         return last_close > swing_high, last_close < swing_low
 
+    def last_two_bars(df_15m: pd.DataFrame):
+        # Scalar .iat reads per column; avoids materialising each row as a Series
+        cols = ("open", "high", "low", "close")
+        return {k: df_15m[k].iat[-2] for k in cols}, {k: df_15m[k].iat[-1] for k in cols}
+
     # ✅ UPDATED (1) soft break + (2) dynamic body_ok threshold when narrative stacked
     def detect_entry_confirmation(
         df_15m: pd.DataFrame,
@@ -242,8 +254,7 @@ def build_snapshot():
         if df_15m is None or df_15m.empty or len(df_15m) < 5:
             return False, "none"
 
-        c2 = df_15m.iloc[-2]
-        c3 = df_15m.iloc[-1]
+        c2, c3 = last_two_bars(df_15m)
 
         def _f(x):
             try:
@@ -319,8 +330,7 @@ def build_snapshot():
         if df_15m is None or df_15m.empty or len(df_15m) < 10:
             return False, "none"
 
-        c2 = df_15m.iloc[-2]
-        c3 = df_15m.iloc[-1]
+        c2, c3 = last_two_bars(df_15m)
 
         def _f(x):
             try:
@@ -382,8 +392,8 @@ def build_snapshot():
         r_high, r_low = float(recent["high"].max()), float(recent["low"].min())
         p_high, p_low = float(prev["high"].max()), float(prev["low"].min())
 
-        c0 = float(recent["close"].iloc[0])
-        c1 = float(recent["close"].iloc[-1])
+        c0 = float(recent["close"].iat[0])
+        c1 = float(recent["close"].iat[-1])
 
         up = (r_high > p_high) and (r_low > p_low) and (c1 > c0)
         dn = (r_high < p_high) and (r_low < p_low) and (c1 < c0)
@@ -409,7 +419,7 @@ def build_snapshot():
         prev_low = float(prev["low"].min())
 
         rng_ = recent_high - recent_low
-        last_close = float(df_15m["close"].iloc[-1])
+        last_close = float(df_15m["close"].iat[-1])
         if last_close <= 0:
             return False
 
@@ -418,9 +428,9 @@ def build_snapshot():
             return False
 
         if po3_bias == "bullish":
-            return (recent_high > prev_high) or (float(recent["close"].iloc[-1]) > float(recent["close"].iloc[0]))
+            return (recent_high > prev_high) or (float(recent["close"].iat[-1]) > float(recent["close"].iat[0]))
         if po3_bias == "bearish":
-            return (recent_low < prev_low) or (float(recent["close"].iloc[-1]) < float(recent["close"].iloc[0]))
+            return (recent_low < prev_low) or (float(recent["close"].iat[-1]) < float(recent["close"].iat[0]))
         return False
 
     now_utc = datetime.now(timezone.utc)
@@ -431,19 +441,27 @@ def build_snapshot():
     session_valid_continuation = flags["session_valid_continuation"]
     session_alignment = session_valid_continuation
 
-    news_block = False
-    try:
-        news_block = len(get_high_impact_news()) > 0
-    except Exception:
-        news_block = False
+    # The news calendar and the OHLC fan-out are independent network calls;
+    # run the calendar on a side thread so the snapshot waits for the slower
+    # of the two instead of their sum.
+    with ThreadPoolExecutor(max_workers=1) as news_pool:
+        news_future = news_pool.submit(get_high_impact_news)
 
-    for sym in symbols:
         try:
-            df = fetch_ohlc(sym, interval="15m", period="5d")
-            htf_df = fetch_ohlc(sym, interval="4h", period="30d")
+            frames = fetch_ohlc_timeframes(symbols, (("15m", "5d"), ("4h", "30d")))
+            frames_15m, frames_4h = frames.get("15m", {}), frames.get("4h", {})
         except Exception:
-            df = pd.DataFrame()
-            htf_df = pd.DataFrame()
+            frames_15m, frames_4h = {}, {}
+
+        news_block = False
+        try:
+            news_block = len(news_future.result()) > 0
+        except Exception:
+            news_block = False
+
+    for sym in symbols:
+        df = frames_15m.get(sym)
+        htf_df = frames_4h.get(sym)
 
         if not isinstance(df, pd.DataFrame):
             df = pd.DataFrame()
@@ -484,6 +502,7 @@ def build_snapshot():
                 "near_fvg": False,
                 "fvg_score": 0.0,
                 "df": df,
+                **_last_bar_fields(df, sym),
                 "news_risk": "against" if news_block else "none",
                 "news_block": news_block,
                 "volatility_risk": "normal",
@@ -513,8 +532,8 @@ def build_snapshot():
         mss_bull, mss_bear = detect_mss(df)
         mss_shift = (po3_bias == "bullish" and mss_bull) or (po3_bias == "bearish" and mss_bear)
 
-        agreement_line = current_4h_open(htf_df, float(df["close"].iloc[-1]))
-        last_close = float(df["close"].iloc[-1])
+        agreement_line = current_4h_open(htf_df, float(df["close"].iat[-1]))
+        last_close = float(df["close"].iat[-1])
         agreement_reclaim = (
             (po3_bias == "bullish" and last_close > agreement_line)
             or (po3_bias == "bearish" and last_close < agreement_line)
@@ -539,13 +558,13 @@ def build_snapshot():
         distribution_active = (po3_phase == "DISTRIBUTION")
 
         # ---------- Liquidity / Volatility ----------
-        last_range = float(df["high"].iloc[-1] - df["low"].iloc[-1])
-        avg_range = float((df["high"] - df["low"]).rolling(20).mean().iloc[-1])
+        last_range = float(df["high"].iat[-1] - df["low"].iat[-1])
+        tail_20 = df.tail(20)
+        avg_range = float((tail_20["high"] - tail_20["low"]).mean()) if len(tail_20) == 20 else 0.0
         liquidity_ok = bool(avg_range > 0 and last_range > avg_range * 1.05)
 
-        a = atr(df).iloc[-1]
-        a = float(a) if pd.notna(a) else 0.0
-        entry = float(df["close"].iloc[-1])
+        a = last_atr(df)
+        entry = float(df["close"].iat[-1])
 
         high_thr, extreme_thr = 0.006, 0.010
         if sym in ("XAUUSD", "XAGUSD", "WTI"):
@@ -660,6 +679,7 @@ def build_snapshot():
             "near_fvg": near_fvg,
             "fvg_score": fvg_score,
             "df": df,
+            **_last_bar_fields(df, sym),
             "news_risk": "against" if news_block else "none",
             "news_block": news_block,
             "volatility_risk": volatility_risk,
@@ -678,7 +698,7 @@ def build_snapshot():
     # inject phase/setup metadata onto each decision for dashboard/alerts
     for d in decisions:
         f = factors_by_symbol.get(d.symbol, {})
-        d.meta = dict(getattr(d, "meta", {}) or {})
+        d.meta = dict(d.meta or {})
         d.meta.setdefault("po3_phase", str(f.get("po3_phase", "ACCUMULATION")).upper())
         d.meta.setdefault("data_provider", f.get("data_provider", "unknown"))
         d.meta.setdefault("used_ticker", f.get("used_ticker", d.symbol))
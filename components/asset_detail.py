@@ -4,62 +4,9 @@ import streamlit as st
 import plotly.graph_objects as go
 
 from data.live_data import fetch_ohlc
-from engine.scoring import build_score_breakdown
-
-def detect_fvgs(df, lookback=120):
-    # Simple 3-candle FVG detection (ICT-style)
-    # Bullish FVG: candle i-2 HIGH < candle i LOW
-    # Bearish FVG: candle i-2 LOW  > candle i HIGH
-    # Returns list of dicts
-
-    d = df.tail(lookback).copy()
-    if len(d) < 5:
-        return []
-
-    highs = d["high"].values
-    lows = d["low"].values
-    idx = list(d.index)
-
-    fvgs = []
-    for i in range(2, len(d)):
-        # Bullish FVG
-        if highs[i - 2] < lows[i]:
-            fvgs.append(
-                {
-                    "type": "bull",
-                    "top": float(lows[i]),
-                    "bottom": float(highs[i - 2]),
-                    "start": idx[i - 2],
-                    "end": idx[i],
-                }
-            )
-
-        # Bearish FVG
-        if lows[i - 2] > highs[i]:
-            fvgs.append(
-                {
-                    "type": "bear",
-                    "top": float(lows[i - 2]),
-                    "bottom": float(highs[i]),
-                    "start": idx[i - 2],
-                    "end": idx[i],
-                }
-            )
-
-    return fvgs
-
-
-def pick_recent_fvgs(fvgs, max_show=3):
-    """Keep the most recent few FVGs."""
-    if not fvgs:
-        return []
-    return fvgs[-max_show:]
-
+from engine.fvg import detect_fvgs, pick_recent_fvgs, price_in_zone
+from engine.scoring import FIRE_ACTIONS, build_score_breakdown
 
-def price_in_zone(price, zone_top, zone_bottom, pad=0.0):
-    top = max(zone_top, zone_bottom) + pad
-    bottom = min(zone_top, zone_bottom) - pad
-    return bottom <= price <= top
 
 def render_asset_detail(profile, decision, factors=None):
     factors = factors or {}
@@ -87,8 +34,11 @@ def render_asset_detail(profile, decision, factors=None):
     near_fvg = bool(factors.get("near_fvg", False))
 
     st.caption(f"Near FVG: {'✅ Yes' if near_fvg else '– No'} • FVG score: {fvg_score:.2f}")
-    # Fetch live data early so we can show the data source
-    df = fetch_ohlc(profile.symbol, interval="15m", period="5d")
+    # Reuse the 15m/5d frame the snapshot already fetched; only go back to the
+    # feed when it isn't there (e.g. the snapshot fetch came back empty).
+    df = factors.get("df")
+    if not isinstance(df, pd.DataFrame) or df.empty:
+        df = fetch_ohlc(profile.symbol, interval="15m", period="5d")
     used_ticker = df.attrs.get("used_ticker")
     if used_ticker:
         st.caption(f"Data source: {used_ticker}")
@@ -124,15 +74,15 @@ def render_asset_detail(profile, decision, factors=None):
     # --------------------
     # FVG overlays (recent only)
     # --------------------
-    fvgs = pick_recent_fvgs(detect_fvgs(df, lookback=160), max_show=3)
-    last_price = float(df["close"].iloc[-1])
+    fvgs = pick_recent_fvgs(detect_fvgs(df, lookback=160, symbol=profile.symbol), max_show=3)
+    last_price = float(df["close"].iat[-1])
     near_fvg = False
 
     for z in fvgs:
-        x0 = z["start"]
+        x0 = z.start
         x1 = df.index[-1]
-        y0 = min(z["top"], z["bottom"])
-        y1 = max(z["top"], z["bottom"])
+        y0 = min(z.top, z.bottom)
+        y1 = max(z.top, z.bottom)
 
         fig.add_shape(
             type="rect",
@@ -141,11 +91,11 @@ def render_asset_detail(profile, decision, factors=None):
             y0=y0,
             y1=y1,
             line=dict(width=1),
-            fillcolor="rgba(0, 255, 0, 0.10)" if z["type"] == "bull" else "rgba(255, 0, 0, 0.10)",
+            fillcolor="rgba(0, 255, 0, 0.10)" if z.type == "bull" else "rgba(255, 0, 0, 0.10)",
             layer="below",
         )
 
-        if price_in_zone(last_price, z["top"], z["bottom"], pad=(last_price * 0.0003)):
+        if price_in_zone(last_price, z.top, z.bottom, pad=(last_price * 0.0003)):
             near_fvg = True
 
     if fvgs:
@@ -168,7 +118,7 @@ def render_asset_detail(profile, decision, factors=None):
     st.markdown("### Decision")
     
     action = str(decision.action)
-    if action in ("BUY NOW", "SELL NOW"):
+    if action in FIRE_ACTIONS:
         st.success(action)
     elif action in ("WAIT", "WATCH"):
         st.warning(action)
@@ -3,10 +3,11 @@ import pandas as pd
 
 def render_portfolio_panel(state):
     st.subheader("Portfolio")
-        # one-run guard so reset/close doesn't trap the app in reruns
+    # one-run guard so reset/close doesn't trap the app in reruns
     if state.get("_did_portfolio_action"):
         state["_did_portfolio_action"] = False
-        # --- Actions ---
+
+    # --- Actions ---
     p = state.get("portfolio", {})
 
     colA, colB, colC = st.columns([1, 1, 2])
@@ -34,8 +35,8 @@ def render_portfolio_panel(state):
         state["portfolio_last_open_count"] = 0
         state["portfolio_last_closed_count"] = 0
 
-    st.success("Portfolio reset.")
-    state["_did_portfolio_action"] = True
+        st.success("Portfolio reset.")
+        state["_did_portfolio_action"] = True
 
 
     if close_all:
@@ -16,12 +16,23 @@ from __future__ import annotations
 
 import json
 import os
+import threading
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Union
 from urllib.parse import parse_qs, urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except Exception:
+    def _loads(raw: bytes) -> Any:
+        return json.loads(raw.decode("utf-8"))
 
 try:
     from fastapi import FastAPI, HTTPException, Query
@@ -36,6 +47,34 @@ def _env(name: str, default: str = "") -> str:
     return os.getenv(name, default).strip()
 
 
+# One keep-alive session for token + candle calls so repeated polls reuse the
+# TCP/TLS connection instead of handshaking on every request. The dashboard
+# fans fetches out over a thread pool (data.live_data.FETCH_MAX_WORKERS); the
+# per-host pool must be at least that wide or urllib3 drops the surplus
+# sockets after each batch and the next refresh reconnects them.
+# Idempotent GETs are retried twice on throttling/gateway errors with a short
+# backoff, and a failed connect once; a read timeout is not retried, so a
+# hanging upstream costs one timeout per fetch and reaches the circuit breaker
+# in data.live_data. The token POST is not retried. requests already
+# negotiates gzip.
+HTTP_POOL_SIZE = int(os.getenv("CTRADER_HTTP_POOL_SIZE", "16"))
+_RETRY = Retry(
+    total=2,
+    connect=1,
+    read=False,
+    backoff_factor=0.2,
+    status_forcelist=(429, 502, 503, 504),
+    raise_on_status=False,
+)
+_HTTP = requests.Session()
+_HTTP.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=_RETRY))
+_HTTP.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=_RETRY))
+
+# 5000 bars of OHLCV JSON is well under 1 MB; anything past this is a broken
+# or hostile upstream.
+MAX_PAYLOAD_BYTES = 8 * 1024 * 1024
+
+
 @dataclass
 class Candle:
     time: datetime
@@ -65,14 +104,23 @@ class CTraderAdapter:
         self.access_token = _env("CTRADER_ACCESS_TOKEN")
         self.api_key = _env("CTRADER_API_KEY")
         self.upstream_candles_url = _env("CTRADER_UPSTREAM_CANDLES_URL")
+        # "candles" | "array" | "columnar"; empty means detect from the first payload
+        self.payload_format = _env("CTRADER_PAYLOAD_FORMAT").lower()
         self.connected = False
         self._client = None
+        self._connect_lock = threading.Lock()
 
     def connect(self) -> None:
         """Connect/authenticate once for upstream API or SDK mode."""
         if self.connected:
             return
+        # The dashboard shares one adapter across its fetch threads; only the
+        # first of them should authenticate.
+        with self._connect_lock:
+            if not self.connected:
+                self._connect()
 
+    def _connect(self) -> None:
         if not self.client_id or not self.client_secret or not self.account_id:
             raise RuntimeError(
                 "Missing CTRADER_CLIENT_ID / CTRADER_CLIENT_SECRET / CTRADER_ACCOUNT_ID env vars"
@@ -103,7 +151,7 @@ class CTraderAdapter:
             ) from e
 
     def _fetch_access_token(self) -> str:
-        r = requests.post(
+        r = _HTTP.post(
             self.token_url,
             data={
                 "grant_type": "client_credentials",
@@ -114,7 +162,7 @@ class CTraderAdapter:
         )
         if r.status_code != 200:
             raise RuntimeError(f"token_http_{r.status_code}")
-        payload = r.json() if r.text else {}
+        payload = _loads(r.content) if r.content else {}
         token = str(payload.get("access_token", "")).strip()
         if not token:
             raise RuntimeError("token_missing_access_token")
@@ -133,65 +181,105 @@ class CTraderAdapter:
             s = s.replace("Z", "+00:00")
         return datetime.fromisoformat(s).astimezone(timezone.utc)
 
+    @staticmethod
+    def _payload_format(payload: Any) -> str:
+        """Classify a candle payload as "candles", "array" or "columnar"."""
+        if isinstance(payload, dict) and isinstance(payload.get("candles"), list):
+            return "candles"
+        if isinstance(payload, list):
+            return "array"
+        if isinstance(payload, dict) and {"t", "o", "h", "l", "c"}.issubset(payload.keys()):
+            return "columnar"
+        raise RuntimeError("unexpected_payload_shape")
+
+    @staticmethod
+    def _columnar_table(payload: Dict[str, Any]) -> Dict[str, List[Any]]:
+        cols = {k: payload[k] for k in ("t", "o", "h", "l", "c")}
+        n = min(len(col) for col in cols.values())
+        cols["v"] = payload.get("v") or [0.0] * n
+        n = min(n, len(cols["v"]))
+        # Well-formed payloads have equal-length columns; pass those lists
+        # through as-is rather than copying every column with a slice.
+        return {k: col if len(col) == n else col[:n] for k, col in cols.items()}
+
+    @classmethod
+    def _candle_table(
+        cls, payload: Any, fmt: str = ""
+    ) -> Union[List[Dict[str, Any]], Dict[str, List[Any]]]:
+        """
+        Unwrap the supported payload shapes without touching individual bars.
+
+        Returns either a list of candle records or a dict of equal-length column
+        lists ("t"/"o"/"h"/"l"/"c"/"v"), both of which load straight into a
+        DataFrame for vectorized parsing. `fmt` skips shape detection when the
+        format is already known.
+        """
+        fmt = fmt or cls._payload_format(payload)
+        if fmt == "candles":
+            return payload["candles"]
+        if fmt == "array":
+            if not isinstance(payload, list):
+                raise TypeError("payload is not a candle array")
+            return payload
+        if fmt == "columnar":
+            return cls._columnar_table(payload)
+        raise RuntimeError(f"unknown_payload_format:{fmt}")
+
     @classmethod
     def _normalize_payload(cls, payload: Any) -> List[Candle]:
-        if isinstance(payload, dict) and isinstance(payload.get("candles"), list):
-            items = payload["candles"]
-        elif isinstance(payload, list):
-            items = payload
-        elif isinstance(payload, dict) and {"t", "o", "h", "l", "c"}.issubset(payload.keys()):
-            t = payload.get("t", [])
-            o = payload.get("o", [])
-            h = payload.get("h", [])
-            l = payload.get("l", [])
-            c = payload.get("c", [])
-            v = payload.get("v", [0.0] * len(t))
-            n = min(len(t), len(o), len(h), len(l), len(c), len(v))
-            items = [
-                {"time": t[i], "open": o[i], "high": h[i], "low": l[i], "close": c[i], "volume": v[i]}
-                for i in range(n)
+        table = cls._candle_table(payload)
+        parse_time = cls._parse_time
+        if isinstance(table, dict):
+            # Columns zip straight into Candles; no per-bar dict or key probing.
+            out: List[Candle] = [
+                Candle(parse_time(t), float(o), float(h), float(l), float(c), float(v or 0.0))
+                for t, o, h, l, c, v in zip(table["t"], table["o"], table["h"], table["l"], table["c"], table["v"])
             ]
         else:
-            raise RuntimeError("unexpected_payload_shape")
-
-        out: List[Candle] = []
-        for x in items:
-            out.append(
+            out = [
                 Candle(
-                    time=cls._parse_time(x.get("time") or x.get("t") or x.get("timestamp") or x.get("datetime")),
+                    time=parse_time(x.get("time") or x.get("t") or x.get("timestamp") or x.get("datetime")),
                     open=float(x.get("open", x.get("o"))),
                     high=float(x.get("high", x.get("h"))),
                     low=float(x.get("low", x.get("l"))),
                     close=float(x.get("close", x.get("c"))),
                     volume=float(x.get("volume", x.get("v", 0.0) or 0.0)),
                 )
-            )
+                for x in table
+            ]
 
         if not out:
             raise RuntimeError("normalized_frame_empty")
 
         return out
 
-    def _fetch_via_upstream(self, symbol: str, timeframe: str, count: int) -> List[Candle]:
+    def _fetch_via_upstream(self, symbol: str, timeframe: str, count: int) -> Any:
         headers = {"Accept": "application/json"}
         if self.access_token:
             headers["Authorization"] = f"Bearer {self.access_token}"
         if self.api_key:
             headers["X-API-Key"] = self.api_key
 
-        r = requests.get(
+        # Read the body straight into one bytes buffer for the JSON parser,
+        # capped so a misbehaving upstream can't force a huge allocation.
+        with _HTTP.get(
             self.upstream_candles_url,
             params={"symbol": symbol, "timeframe": timeframe, "count": count},
             headers=headers,
             timeout=20,
-        )
-        if r.status_code != 200:
-            raise RuntimeError(f"upstream_http_{r.status_code}")
-
-        payload = r.json() if r.text else {}
-        return self._normalize_payload(payload)
-
-    def fetch_candles(self, symbol: str, timeframe: str, count: int) -> List[Candle]:
+            stream=True,
+        ) as r:
+            if r.status_code != 200:
+                raise RuntimeError(f"upstream_http_{r.status_code}")
+            if int(r.headers.get("Content-Length") or 0) > MAX_PAYLOAD_BYTES:
+                raise RuntimeError("upstream_payload_too_large")
+            raw = r.raw.read(MAX_PAYLOAD_BYTES + 1, decode_content=True)
+
+        if len(raw) > MAX_PAYLOAD_BYTES:
+            raise RuntimeError("upstream_payload_too_large")
+        return _loads(raw) if raw else {}
+
+    def _fetch_payload(self, symbol: str, timeframe: str, count: int) -> Any:
         self.connect()
 
         if self.upstream_candles_url:
@@ -204,13 +292,30 @@ class CTraderAdapter:
         for method_name in ("fetch_candles", "get_candles", "get_trendbars"):
             m = getattr(self._client, method_name, None)
             if callable(m):
-                payload = m(symbol=symbol, timeframe=timeframe, count=count)
-                return self._normalize_payload(payload)
+                return m(symbol=symbol, timeframe=timeframe, count=count)
 
         raise RuntimeError(
             "sdk_candle_method_not_found: expected one of fetch_candles/get_candles/get_trendbars"
         )
 
+    def fetch_candles(self, symbol: str, timeframe: str, count: int) -> List[Candle]:
+        return self._normalize_payload(self._fetch_payload(symbol, timeframe, count))
+
+    def fetch_candle_table(
+        self, symbol: str, timeframe: str, count: int
+    ) -> Union[List[Dict[str, Any]], Dict[str, List[Any]]]:
+        """Like fetch_candles, but skips per-bar Candle objects (see _candle_table)."""
+        payload = self._fetch_payload(symbol, timeframe, count)
+        # An endpoint serves one payload shape, so detect it on the first
+        # response (or take CTRADER_PAYLOAD_FORMAT) and reuse it afterwards.
+        if not self.payload_format:
+            self.payload_format = self._payload_format(payload)
+        try:
+            return self._candle_table(payload, self.payload_format)
+        except (KeyError, TypeError):
+            self.payload_format = ""
+            return self._candle_table(payload)
+
 
 adapter = CTraderAdapter()
 
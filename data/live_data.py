@@ -1,7 +1,13 @@
-from datetime import datetime, timezone
+import functools
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
 
+import numpy as np
 import pandas as pd
-import streamlit as st
 
 
 # cTrader symbol mapping (internal -> cTrader symbol)
@@ -41,15 +47,26 @@ INTERVAL_TO_CTRADER = {
 }
 
 
-def _canonical_symbol(symbol: str) -> str:
+# Broker suffix separators; everything from the first one on is dropped.
+_SUFFIX_SEP = re.compile(r"[._-]")
+
+
+# Symbol/interval/period inputs come from a small fixed universe, so the
+# string parsing below is memoized and runs once per distinct value.
+@functools.lru_cache(maxsize=256)
+def canonical_symbol(symbol: str) -> str:
     """Normalize broker symbols that may include suffixes (e.g., XAUUSD.a, US100-cash)."""
-    s = (symbol or "").upper().strip()
-    for sep in (".", "-", "_"):
-        if sep in s:
-            s = s.split(sep, 1)[0]
-    return s
+    return _SUFFIX_SEP.split((symbol or "").upper().strip(), 1)[0]
+
+
+@functools.lru_cache(maxsize=256)
+def _resolve_symbol(symbol: str) -> Tuple[str, str]:
+    """(canonical symbol, cTrader symbol) in one cached lookup."""
+    sym = canonical_symbol(symbol)
+    return sym, CTRADER_SYMBOL_MAP.get(sym, sym)
 
 
+@functools.lru_cache(maxsize=256)
 def _interval_minutes(interval: str) -> int:
     if interval.endswith("m"):
         return max(1, int(interval[:-1]))
@@ -60,6 +77,7 @@ def _interval_minutes(interval: str) -> int:
     return 15
 
 
+@functools.lru_cache(maxsize=256)
 def _period_to_count(period: str, interval: str) -> int:
     period = (period or "5d").strip().lower()
     unit = period[-1]
@@ -81,6 +99,15 @@ def _period_to_count(period: str, interval: str) -> int:
     return max(120, min(5000, bars))
 
 
+# Bar counts for every supported interval x the periods the dashboard asks
+# for, resolved once at import; other periods fall back to _period_to_count.
+_BARS_TABLE: Dict[Tuple[str, str], int] = {
+    (i, p): _period_to_count(p, i)
+    for i in INTERVAL_TO_CTRADER
+    for p in ("1d", "2d", "5d", "7d", "14d", "30d", "60d", "1w", "2w", "1m", "3m")
+}
+
+
 def _normalize_candle_frame(df: pd.DataFrame) -> pd.DataFrame:
     # Normalize common column aliases
     rename_map = {
@@ -98,11 +125,23 @@ def _normalize_candle_frame(df: pd.DataFrame) -> pd.DataFrame:
         "timestamp": "time",
         "datetime": "time",
     }
-    cols = {c: rename_map.get(c, c) for c in df.columns}
+    cols = {}
+    for c in df.columns:
+        target = rename_map.get(c, c)
+        # first alias wins; a payload carrying both "t" and "time" keeps one column
+        if target != c and (target in df.columns or target in cols.values()):
+            continue
+        cols[c] = target
     df = df.rename(columns=cols)
 
     if "time" in df.columns:
-        df["time"] = pd.to_datetime(df["time"], utc=True, errors="coerce")
+        raw_time = df["time"]
+        if pd.api.types.is_numeric_dtype(raw_time):
+            # epoch seconds or milliseconds
+            unit = "ms" if raw_time.abs().max() > 10_000_000_000 else "s"
+            df["time"] = pd.to_datetime(raw_time, unit=unit, utc=True, errors="coerce")
+        else:
+            df["time"] = pd.to_datetime(raw_time, utc=True, errors="coerce")
         df = df.dropna(subset=["time"]).set_index("time").sort_index()
     elif not isinstance(df.index, pd.DatetimeIndex):
         return pd.DataFrame()
@@ -113,13 +152,154 @@ def _normalize_candle_frame(df: pd.DataFrame) -> pd.DataFrame:
                 df[col] = 0.0
             else:
                 return pd.DataFrame()
-        df[col] = pd.to_numeric(df[col], errors="coerce")
+        if df[col].dtype.kind not in "fiu":
+            df[col] = pd.to_numeric(df[col], errors="coerce")
 
-    df = df[["open", "high", "low", "close", "volume"]].dropna(subset=["open", "high", "low", "close"])
+    df = df[["open", "high", "low", "close", "volume"]]
+    if df.isna().to_numpy().any():
+        df = df.dropna(subset=["open", "high", "low", "close"])
+        df["volume"] = df["volume"].fillna(0.0)
     return df
 
 
-def _fetch_ctrader_ohlc(symbol: str, interval: str, period: str) -> pd.DataFrame:
+def _frame_from_columns(table: Dict[str, list]) -> pd.DataFrame:
+    """
+    Fast path for the array-style payload ({"t","o","h","l","c","v"} lists).
+
+    Values are already JSON numbers, so each column converts straight into a
+    float64 ndarray and epoch timestamps become datetime64 without going
+    through the generic parsers (ISO timestamps take one vectorized
+    to_datetime). Falls back to _normalize_candle_frame for anything that
+    doesn't convert cleanly (non-numeric prices).
+    """
+    try:
+        cols = {
+            "open": np.asarray(table["o"], dtype=np.float64),
+            "high": np.asarray(table["h"], dtype=np.float64),
+            "low": np.asarray(table["l"], dtype=np.float64),
+            "close": np.asarray(table["c"], dtype=np.float64),
+            "volume": np.asarray(table["v"], dtype=np.float64),
+        }
+    except (TypeError, ValueError):
+        return _normalize_candle_frame(pd.DataFrame(table))
+
+    try:
+        t = np.asarray(table["t"], dtype=np.int64)
+        unit = "datetime64[ms]" if t.size and np.abs(t).max() > 10_000_000_000 else "datetime64[s]"
+        index = pd.DatetimeIndex(t.astype(unit), tz="UTC", name="time")
+    except (TypeError, ValueError):
+        # Upstream timestamps are RFC 3339; naming the format skips pandas'
+        # per-call format inference.
+        times = pd.to_datetime(table["t"], utc=True, errors="coerce", format="ISO8601", cache=True)
+        index = pd.DatetimeIndex(times, name="time")
+
+    # One boolean mask over the raw arrays drops incomplete bars before the
+    # frame exists, instead of dropna() + fillna() passes over the DataFrame.
+    keep = np.isfinite(cols["open"]) & np.isfinite(cols["high"])
+    keep &= np.isfinite(cols["low"]) & np.isfinite(cols["close"])
+    keep &= ~index.isna()
+    if not keep.all():
+        index = index[keep]
+        cols = {k: v[keep] for k, v in cols.items()}
+    cols["volume"] = np.nan_to_num(cols["volume"], nan=0.0)
+
+    return pd.DataFrame(cols, index=index).sort_index()
+
+
+# Record-style payloads ([{"time": ..., "open": ...}, ...]) are transposed
+# into the same column dict using the first key present for each field.
+_RECORD_KEYS = {
+    "t": ("time", "t", "timestamp", "datetime"),
+    "o": ("open", "o", "Open"),
+    "h": ("high", "h", "High"),
+    "l": ("low", "l", "Low"),
+    "c": ("close", "c", "Close"),
+    "v": ("volume", "v", "Volume"),
+}
+
+
+def _columns_from_records(records: list) -> Optional[Dict[str, list]]:
+    first = records[0]
+    if not isinstance(first, dict):
+        return None
+    table: Dict[str, list] = {}
+    for short, names in _RECORD_KEYS.items():
+        # volume is optional; missing values become 0.0 in _frame_from_columns
+        key = next((n for n in names if n in first), "volume" if short == "v" else None)
+        if key is None:
+            return None
+        table[short] = [r.get(key) for r in records]
+    return table
+
+
+class OhlcResult(NamedTuple):
+    """Candles plus where they came from; `error` is empty on success."""
+
+    df: pd.DataFrame
+    provider: str
+    ticker: str
+    error: str = ""
+
+
+OHLC_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+# float32 halves the size of every cached frame. It keeps ~7 significant
+# digits: exact to quote precision for FX/JPY crosses, but index and gold
+# prices lose digits (US30 near 4e4 is off by up to ~2e-3), so prices that
+# leave the frame as levels are rounded to the symbol's quote decimals
+# (app._last_bar_fields / _round_price). Volume stays float since some feeds
+# report fractional tick volume.
+OHLC_DTYPES = {col: "float32" for col in OHLC_COLUMNS}
+
+
+# Shared empty frame for every failed fetch; like all cached frames it is
+# handed out via shallow copies and never written to.
+_EMPTY_FRAME = pd.DataFrame(columns=OHLC_COLUMNS)
+
+
+def _empty_result(provider: str, ticker: str, error: str) -> OhlcResult:
+    return OhlcResult(_EMPTY_FRAME, provider, ticker, error)
+
+
+# Error prefix for fetches that failed because the provider is down or
+# refusing work (connection errors, timeouts, HTTP 429/5xx), as opposed to
+# the broker answering with nothing or a 404 for one symbol.
+PROVIDER_ERROR_PREFIX = "sdk_provider_error:"
+
+# ctrader_client reports upstream HTTP failures as RuntimeError("upstream_http_<status>").
+_UPSTREAM_STATUS = re.compile(r"upstream_http_(\d{3})")
+
+
+def _is_provider_failure(e: Exception) -> bool:
+    # requests' connection/timeout exceptions are OSErrors too
+    if isinstance(e, OSError):
+        return True
+    m = _UPSTREAM_STATUS.match(str(e))
+    return m is not None and (m.group(1) == "429" or m.group(1).startswith("5"))
+
+
+def _is_session_failure(e: Exception) -> bool:
+    """Errors that a fresh adapter (new connection/access token) could fix."""
+    if isinstance(e, OSError):
+        return True
+    msg = str(e)
+    if msg.startswith("token_"):  # token_http_<status> / token_missing_access_token
+        return True
+    m = _UPSTREAM_STATUS.match(msg)
+    return m is not None and m.group(1) in ("401", "403")
+
+
+@functools.lru_cache(maxsize=1)
+def _ctrader_adapter():
+    # Credentials don't change during a Streamlit process, so build the adapter
+    # once and let it keep its connection/access token between fetches.
+    # Import lazily so app still loads even if SDK deps are missing.
+    from ctrader_client import CTraderAdapter
+
+    return CTraderAdapter()
+
+
+def _fetch_ctrader_ohlc(symbol: str, interval: str, period: str, count: Optional[int] = None) -> OhlcResult:
     """
     Pull candles directly through cTrader adapter (SDK/upstream) without requiring
     CTRADER_LIVE_DATA_URL in Streamlit runtime.
@@ -132,73 +312,294 @@ def _fetch_ctrader_ohlc(symbol: str, interval: str, period: str) -> pd.DataFrame
     Optional:
       - CTRADER_UPSTREAM_CANDLES_URL (if using upstream HTTP candle source)
       - CTRADER_TOKEN_URL / CTRADER_ACCESS_TOKEN / CTRADER_API_KEY
+
+    `count` overrides the bar count derived from `period` (used for tail refreshes).
     """
-    sym = _canonical_symbol(symbol)
-    ctrader_symbol = CTRADER_SYMBOL_MAP.get(sym, sym)
+    sym, ctrader_symbol = _resolve_symbol(symbol)
     tf = INTERVAL_TO_CTRADER.get(interval, "M15")
-    count = _period_to_count(period, interval)
+    if count is None:
+        count = _BARS_TABLE.get((interval, period)) or _period_to_count(period, interval)
 
     try:
-        # Import lazily so app still loads even if SDK deps are missing.
-        from ctrader_client import CTraderAdapter
+        adapter = _ctrader_adapter()
     except Exception:
-        out = pd.DataFrame()
-        out.attrs["fetch_error"] = "ctrader_adapter_import_failed"
-        return out
+        return _empty_result("none", sym, "ctrader_adapter_import_failed")
 
     try:
-        adapter = CTraderAdapter()
-        candles = adapter.fetch_candles(symbol=ctrader_symbol, timeframe=tf, count=count)
-        if not candles:
-            out = pd.DataFrame()
-            out.attrs["fetch_error"] = "sdk_empty_candles"
-            return out
-
-        df = pd.DataFrame([c.as_json() if hasattr(c, "as_json") else c for c in candles])
-        df = _normalize_candle_frame(df)
+        table = adapter.fetch_candle_table(symbol=ctrader_symbol, timeframe=tf, count=count)
+        if not table or (isinstance(table, dict) and not table["t"]):
+            return _empty_result("none", sym, "sdk_empty_candles")
+
+        # Column-wise parse: one vectorized timestamp/numeric pass per column
+        # instead of building a Candle object per bar.
+        columns = table if isinstance(table, dict) else _columns_from_records(table)
+        if columns is not None:
+            df = _frame_from_columns(columns)
+        else:
+            df = _normalize_candle_frame(pd.DataFrame(table))
         if df.empty:
-            out = pd.DataFrame()
-            out.attrs["fetch_error"] = "normalized_frame_empty"
-            return out
+            return _empty_result("none", sym, "normalized_frame_empty")
 
-        df.attrs["used_ticker"] = ctrader_symbol
-        df.attrs["provider"] = "ctrader_sdk"
-        return df
+        return OhlcResult(df.astype(OHLC_DTYPES, copy=False), "ctrader_sdk", ctrader_symbol)
     except Exception as e:
-        out = pd.DataFrame()
-        out.attrs["fetch_error"] = f"sdk_error:{e}"
-        return out
+        # Drop the shared adapter on auth/transport errors so an expired token
+        # or dead connection is rebuilt on the next fetch. Per-symbol errors
+        # (404, bad payload) leave it alone for the other fetch threads.
+        if _is_session_failure(e):
+            _ctrader_adapter.cache_clear()
+        # Only provider-level failures count toward the circuit breaker.
+        prefix = PROVIDER_ERROR_PREFIX if _is_provider_failure(e) else "sdk_error:"
+        return _empty_result("none", sym, f"{prefix}{e}")
 
 
-@st.cache_data(ttl=30, show_spinner=False)
-def fetch_ohlc(symbol: str, interval: str = "15m", period: str = "5d") -> pd.DataFrame:
+# Upstream candle calls are blocking HTTP, so a handful of threads is enough to
+# overlap round-trips when the dashboard refreshes the whole watchlist.
+FETCH_MAX_WORKERS = 8
+
+
+# Per-provider circuit breaker: provider -> (consecutive failures, open-until).
+# After CB_FAILURE_THRESHOLD provider failures in a row (PROVIDER_ERROR_PREFIX)
+# the provider is skipped for min(60s * 2**failures, 10min) rather than paying
+# its timeout on every rerun. Empty answers or a 404 for one symbol say nothing
+# about the provider and don't count.
+CB_FAILURE_THRESHOLD = 3
+_CB: Dict[str, Tuple[int, float]] = {}
+_CB_LOCK = threading.Lock()
+
+
+def _circuit_open(provider: str) -> bool:
+    with _CB_LOCK:
+        _, open_until = _CB.get(provider, (0, 0.0))
+    return time.monotonic() < open_until
+
+
+def _record_outcome(provider: str, ok: bool) -> None:
+    with _CB_LOCK:
+        if ok:
+            _CB.pop(provider, None)
+            return
+        failures = _CB.get(provider, (0, 0.0))[0] + 1
+        open_until = 0.0
+        if failures >= CB_FAILURE_THRESHOLD:
+            open_until = time.monotonic() + min(60 * 2 ** failures, 600)
+        _CB[provider] = (failures, open_until)
+
+
+# The bridge rejects candle requests for fewer bars than this.
+TAIL_MIN_BARS = 10
+
+
+def _tail_refresh(prev: Optional[OhlcResult], symbol: str, interval: str, period: str) -> Optional[OhlcResult]:
     """
-    Fetch OHLC from cTrader SDK/upstream adapter only.
+    Bring an expired cache entry up to date by fetching only the newest bars.
 
-    If source is unavailable, returns empty DataFrame to avoid
-    silently falling back to non-broker feeds.
+    Between refreshes usually only the forming bar changes, so re-downloading
+    the whole period is wasted work. Fetches just enough bars to overlap the
+    previous frame's last (possibly still forming) bar and splices them on.
+    A failed tail request is returned as is, so its error reaches the circuit
+    breaker without a second (full) request paying the same timeout. Returns
+    None when a full fetch is needed instead: no usable previous frame, too
+    many bars missing, or a tail that doesn't overlap it.
     """
-    df = _fetch_ctrader_ohlc(symbol, interval, period)
-    if not isinstance(df, pd.DataFrame) or df.empty:
-        out = pd.DataFrame(columns=["open", "high", "low", "close", "volume"])
-        out.attrs["provider"] = "none"
-        out.attrs["used_ticker"] = _canonical_symbol(symbol)
-        out.attrs["fetch_error"] = str(getattr(df, "attrs", {}).get("fetch_error", "ctrader_source_unavailable"))
-        return out
+    if prev is None or prev.error or prev.df.empty:
+        return None
+    full = _BARS_TABLE.get((interval, period)) or _period_to_count(period, interval)
+    last_ts = prev.df.index[-1]
+    lag_min = (pd.Timestamp.now(tz="UTC") - last_ts).total_seconds() / 60.0
+    n = max(TAIL_MIN_BARS, int(lag_min // _interval_minutes(interval)) + 2)
+    if n >= full // 2:
+        return None
+
+    tail = _fetch_ctrader_ohlc(symbol, interval, period, count=n)
+    if tail.df.empty:
+        return tail
+    if tail.df.index[0] > last_ts:
+        return None  # no overlap with what we hold
+    head = prev.df[prev.df.index < tail.df.index[0]]
+    return tail._replace(df=pd.concat([head, tail.df]).iloc[-full:])
+
+
+def _fetch_ohlc_uncached(
+    symbol: str, interval: str, period: str, prev: Optional[OhlcResult] = None
+) -> OhlcResult:
+    if _circuit_open("ctrader"):
+        return _empty_result("none", canonical_symbol(symbol), "ctrader_circuit_open")
+
+    res = _tail_refresh(prev, symbol, interval, period) or _fetch_ctrader_ohlc(symbol, interval, period)
+    _record_outcome("ctrader", not res.error.startswith(PROVIDER_ERROR_PREFIX))
+    if res.df.empty:
+        return res._replace(error=res.error or "ctrader_source_unavailable")
 
     # Guard against stale bars
+    df = res.df
     try:
-        last_ts = pd.to_datetime(df.index[-1], utc=True)
-        now_ts = datetime.now(timezone.utc)
+        last_ts = df.index[-1]  # already a UTC Timestamp
+        now_ts = pd.Timestamp.now(tz="UTC")
         max_lag_min = max(10, 3 * _interval_minutes(interval))
-        lag_min = (now_ts - last_ts.to_pydatetime()).total_seconds() / 60.0
+        lag_min = (now_ts - last_ts).total_seconds() / 60.0
         if lag_min > max_lag_min:
-            out = pd.DataFrame(columns=["open", "high", "low", "close", "volume"])
-            out.attrs["provider"] = "ctrader_sdk"
-            out.attrs["used_ticker"] = str(df.attrs.get("used_ticker", _canonical_symbol(symbol)))
-            out.attrs["fetch_error"] = f"stale_bars_lag_{round(lag_min,2)}m"
-            return out
+            return _empty_result(res.provider, res.ticker, f"stale_bars_lag_{round(lag_min,2)}m")
     except Exception:
         pass
 
+    return res
+
+
+def _to_frame(res: OhlcResult) -> pd.DataFrame:
+    """
+    Shallow copy of the cached frame with provider/ticker/error mirrored into
+    `attrs`, which is how existing callers read them.
+    """
+    df = res.df.copy(deep=False)
+    df.attrs["provider"] = res.provider
+    df.attrs["used_ticker"] = res.ticker
+    if res.error:
+        df.attrs["fetch_error"] = res.error
     return df
+
+
+# In-process OHLC cache. Frames are stored by reference and handed out as
+# shallow copies, which avoids the pickle round-trip st.cache_data pays on
+# every hit; callers must treat the returned frame as read-only data.
+#
+# The TTL is deliberately shorter than build_snapshot's 60s st.cache_data TTL:
+# on the snapshot path an entry has always expired by the time it is looked
+# up, so there it only seeds the tail refresh (_tail_refresh). Fresh hits come
+# from the asset detail panel, which fetches the 15m frame on every rerun and
+# should not show candles older than this.
+OHLC_CACHE_TTL_SECS = 30
+_OHLC_CACHE: Dict[Tuple[str, str, str], Tuple[float, OhlcResult]] = {}
+_OHLC_CACHE_LOCK = threading.Lock()
+
+
+def _cache_lookup(key: Tuple[str, str, str], now: float) -> Optional[OhlcResult]:
+    hit = _OHLC_CACHE.get(key)
+    if hit is not None and (now - hit[0]) < OHLC_CACHE_TTL_SECS:
+        return hit[1]
+    return None
+
+
+# Optional second-level cache on disk so a Streamlit restart doesn't refetch
+# every frame that is still within TTL. It rewrites one file per
+# symbol/timeframe on every fetch and is only read on a cold start, so it is
+# off unless OHLC_DISK_CACHE_DIR names a directory.
+OHLC_DISK_CACHE_DIR = os.getenv("OHLC_DISK_CACHE_DIR", "").strip()
+
+
+def _disk_cache_path(key: Tuple[str, str, str]) -> str:
+    name = "ctrader_{}_{}_{}.npz".format(*key).replace(os.sep, "_")
+    return os.path.join(OHLC_DISK_CACHE_DIR, name)
+
+
+def _disk_cache_get(key: Tuple[str, str, str]) -> Optional[Tuple[float, OhlcResult]]:
+    """(age in seconds, result) for a disk entry still within TTL, else None."""
+    if not OHLC_DISK_CACHE_DIR:
+        return None
+    path = _disk_cache_path(key)
+    try:
+        age = time.time() - os.path.getmtime(path)
+        if age >= OHLC_CACHE_TTL_SECS:
+            return None
+        with np.load(path, allow_pickle=False) as z:
+            index = pd.DatetimeIndex(z["time"].astype("datetime64[ns]"), tz="UTC", name="time")
+            df = pd.DataFrame({col: z[col] for col in OHLC_COLUMNS}, index=index)
+            res = OhlcResult(df, str(z["provider"]), str(z["ticker"]))
+    except Exception:
+        return None
+    return max(0.0, age), res
+
+
+def _disk_cache_put(key: Tuple[str, str, str], res: OhlcResult) -> None:
+    if not OHLC_DISK_CACHE_DIR or res.error or res.df.empty:
+        return
+    path = _disk_cache_path(key)
+    # np.savez appends ".npz" to names that lack it
+    tmp = f"{path}.{threading.get_ident()}.tmp.npz"
+    try:
+        os.makedirs(OHLC_DISK_CACHE_DIR, exist_ok=True)
+        df = res.df
+        np.savez(
+            tmp,
+            time=df.index.tz_convert("UTC").tz_localize(None).values.astype("datetime64[ns]").view(np.int64),
+            provider=np.str_(res.provider),
+            ticker=np.str_(res.ticker),
+            **{col: df[col].to_numpy(dtype=np.float32) for col in OHLC_COLUMNS},
+        )
+        os.replace(tmp, path)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def _cached_ohlc(symbol: str, interval: str, period: str) -> OhlcResult:
+    key = (symbol, interval, period)
+    now = time.monotonic()
+    with _OHLC_CACHE_LOCK:
+        res = _cache_lookup(key, now)
+        expired = _OHLC_CACHE.get(key)
+    if res is not None:
+        return res
+
+    hit = _disk_cache_get(key)
+    if hit is not None:
+        # Stamp the entry with when it was fetched, not when it was read back,
+        # so a disk hit only lives out the rest of its original TTL.
+        age, res = hit
+        stamp = now - age
+    else:
+        prev = expired[1] if expired else None
+        res = _fetch_ohlc_uncached(symbol, interval, period, prev)
+        _disk_cache_put(key, res)
+        stamp = now
+    with _OHLC_CACHE_LOCK:
+        _OHLC_CACHE[key] = (stamp, res)
+    return res
+
+
+def fetch_ohlc(symbol: str, interval: str = "15m", period: str = "5d") -> pd.DataFrame:
+    """
+    Fetch OHLC from cTrader SDK/upstream adapter only.
+
+    If source is unavailable, returns empty DataFrame to avoid
+    silently falling back to non-broker feeds.
+    """
+    return _to_frame(_cached_ohlc(symbol, interval, period))
+
+
+def _fetch_keys(keys: Sequence[Tuple[str, str, str]]) -> Dict[Tuple[str, str, str], OhlcResult]:
+    """Resolve (symbol, interval, period) keys from cache, fetching misses concurrently."""
+    results: Dict[Tuple[str, str, str], OhlcResult] = {}
+    now = time.monotonic()
+    with _OHLC_CACHE_LOCK:
+        for key in keys:
+            res = _cache_lookup(key, now)
+            if res is not None:
+                results[key] = res
+    misses = [k for k in keys if k not in results]
+
+    if len(misses) == 1:
+        results[misses[0]] = _cached_ohlc(*misses[0])
+    elif misses:
+        workers = min(FETCH_MAX_WORKERS, len(misses))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results.update(zip(misses, pool.map(lambda k: _cached_ohlc(*k), misses)))
+    return results
+
+
+def fetch_ohlc_timeframes(
+    symbols: Sequence[str], timeframes: Sequence[Tuple[str, str]]
+) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """
+    Fetch several (interval, period) pairs for a watchlist in one fan-out.
+
+    Returns {interval: {symbol: frame}}. All requests share one pool, so a slow
+    timeframe doesn't hold back the next one.
+    """
+    keys = [(s, interval, period) for interval, period in timeframes for s in dict.fromkeys(symbols)]
+    results = _fetch_keys(keys)
+    out: Dict[str, Dict[str, pd.DataFrame]] = {}
+    for key in keys:
+        out.setdefault(key[1], {})[key[0]] = _to_frame(results[key])
+    return out
@@ -1,13 +1,73 @@
+import functools
+import json
+import time
 import requests
 import datetime
 import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+
+    _loads = orjson.loads
+except Exception:
+    def _loads(raw: bytes):
+        return json.loads(raw.decode("utf-8"))
+
+CALENDAR_URL = "https://api.tradingeconomics.com/calendar"
+
+# Keep-alive session so each snapshot reuses the TLS connection; transient
+# 429/5xx responses get two quick retries.
+_HTTP = requests.Session()
+_HTTP.mount(
+    "https://",
+    HTTPAdapter(
+        max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=(429, 502, 503, 504), raise_on_status=False)
+    ),
+)
+
+
+# Memoized once found; a missing key is looked up again on the next call so
+# adding it to secrets takes effect without a restart.
+_KEY = None
 
 
 def _get_key():
+    global _KEY
+    if _KEY:
+        return _KEY
     try:
-        return st.secrets.get("TRADINGECONOMICS_KEY")
+        _KEY = st.secrets.get("TRADINGECONOMICS_KEY") or None
     except Exception:
         return None
+    return _KEY
+
+
+# The day's calendar changes rarely, but the ±30 min window is re-checked on
+# every snapshot; fetch the calendar at most once per TTL bucket and filter
+# the cached copy.
+CALENDAR_TTL_SECS = 300
+
+
+@functools.lru_cache(maxsize=1)
+def _fetch_calendar(key: str, day: str, ttl_bucket: int) -> tuple:
+    r = _HTTP.get(
+        CALENDAR_URL,
+        params={"c": key, "f": "json", "d1": day, "d2": day},
+        timeout=10,
+    )
+    r.raise_for_status()
+    return tuple(_loads(r.content)) if r.content else ()
+
+
+NEWS_WINDOW = datetime.timedelta(minutes=30)
+
+
+def _event_time(date_str: str) -> datetime.datetime:
+    # Calendar dates are UTC, with or without a trailing Z/offset.
+    t = datetime.datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+    return t if t.tzinfo else t.replace(tzinfo=datetime.timezone.utc)
 
 
 def get_high_impact_news():
@@ -21,38 +81,22 @@ def get_high_impact_news():
         return []
 
     try:
-        now = datetime.datetime.utcnow()
+        now = datetime.datetime.now(datetime.timezone.utc)
         today = now.strftime("%Y-%m-%d")
-
-        url = f"https://api.tradingeconomics.com/calendar?c={key}&f=json&d1={today}&d2={today}"
-
-        r = requests.get(url, timeout=10)
-        data = r.json()
-
-        risky_events = []
-
-        for event in data:
-            impact = event.get("Importance", 0)
-            if impact < 2:  # only high impact
-                continue
-
-            date_str = event.get("Date")
-            if not date_str:
-                continue
-
-            event_time = datetime.datetime.fromisoformat(date_str.replace("Z", ""))
-
-            diff = abs((event_time - now).total_seconds())
-
-            # within 30 minutes
-            if diff <= 1800:
-                risky_events.append({
-                    "title": event.get("Event"),
-                    "country": event.get("Country"),
-                    "time": event_time
-                })
-
-        return risky_events
+        lo = now - NEWS_WINDOW
+        hi = now + NEWS_WINDOW
+
+        data = _fetch_calendar(key, today, int(time.monotonic() // CALENDAR_TTL_SECS))
+
+        # Importance is checked before the date is parsed, so only
+        # high-impact events (>= 2) pay for fromisoformat.
+        return [
+            {"title": event.get("Event"), "country": event.get("Country"), "time": event_time}
+            for event in data
+            if event.get("Importance", 0) >= 2
+            and (date_str := event.get("Date"))
+            and lo <= (event_time := _event_time(date_str)) <= hi
+        ]
 
     except Exception:
         return []
@@ -1,34 +1,43 @@
+import dataclasses
+import hashlib
+import json
+import os
+import threading
 import time
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 import streamlit as st
 from engine.scoring import (
     decide_from_factors,
     Decision,
+    FIRE_ACTIONS,
     SETUP_SCORE_THRESHOLD,
 )
 from engine.risk import apply_sizing
 
 COOLDOWN_SECS = 60 * 60  # 60 minutes
 
+# Cooldown state is mirrored to disk so a Streamlit restart or a fresh tab
+# doesn't re-fire signals that went out minutes ago. Every session of one
+# deployment shares the file, since they all alert the same Telegram chat; a
+# session picks up the others' fires when it next writes (_save_cooldown).
+# Deployments on the same host get separate files, keyed by
+# TRADING_ASSISTANT_DEPLOYMENT or else by the app directory. Set
+# COOLDOWN_STATE_PATH to choose the file, or "" to disable.
+DEPLOYMENT_ID = os.getenv("TRADING_ASSISTANT_DEPLOYMENT", "").strip().replace(os.sep, "_") or hashlib.sha1(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))).encode("utf-8")
+).hexdigest()[:12]
+COOLDOWN_STATE_PATH = os.getenv(
+    "COOLDOWN_STATE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "trading-assistant", DEPLOYMENT_ID, "cooldown.json"),
+)
+
 
 def _downgrade_to_wait(d: Decision, reason: str) -> Decision:
     """
     Keep trade_plan/meta/sizing, but prevent execution.
     """
-    return Decision(
-        symbol=d.symbol,
-        bias=d.bias,
-        mode="standby",
-        confidence=d.confidence,
-        action="WAIT",
-        commentary=reason,
-        trade_plan=d.trade_plan,  # keep
-        score=d.score,            # keep
-        risk_pct=d.risk_pct,      # keep
-        size=d.size,              # keep
-        meta=d.meta,              # keep
-    )
+    return dataclasses.replace(d, mode="standby", action="WAIT", commentary=reason)
 
 
 def _step4a_min_confidence(d: Decision) -> float:
@@ -48,53 +57,119 @@ def _step4a_min_confidence(d: Decision) -> float:
     return 7.0
 
 
-def run_decisions(profiles: List, factors_by_symbol: Dict[str, Dict]) -> List[Decision]:
-    # Persist cooldown state across Streamlit reruns
-    if "_last_fired" not in st.session_state:
-        st.session_state["_last_fired"] = {}      # symbol -> "BUY NOW"/"SELL NOW"
-    if "_last_fired_ts" not in st.session_state:
-        st.session_state["_last_fired_ts"] = {}   # symbol -> unix seconds
+def _load_cooldown() -> Tuple[Dict[str, str], Dict[str, int]]:
+    if not COOLDOWN_STATE_PATH:
+        return {}, {}
+    try:
+        with open(COOLDOWN_STATE_PATH, "r", encoding="utf-8") as f:
+            raw = json.load(f)
+        # symbol -> [action, unix seconds]
+        last_fired = {str(s): str(e[0]) for s, e in raw.items()}
+        last_fired_ts = {str(s): int(e[1]) for s, e in raw.items()}
+    except Exception:
+        return {}, {}
+    return last_fired, last_fired_ts
 
-    last_fired: Dict[str, str] = st.session_state["_last_fired"]
-    last_fired_ts: Dict[str, int] = st.session_state["_last_fired_ts"]
 
-    decisions: List[Decision] = []
-    now = int(time.time())
+def _save_cooldown(
+    last_fired: Dict[str, str], last_fired_ts: Dict[str, int], cutoff: int
+) -> Tuple[Dict[str, str], Dict[str, int]]:
+    """
+    Merge this session's cooldowns into the shared file and return the union.
 
-    for p in profiles:
-        sym = p.symbol
+    Other sessions write the same file, so their entries are read back first
+    and the newer fire per symbol wins; entries older than `cutoff` are
+    dropped. The file is replaced atomically.
+    """
+    if not COOLDOWN_STATE_PATH:
+        return last_fired, last_fired_ts
+    disk_fired, disk_ts = _load_cooldown()
+    for sym, ts in disk_ts.items():
+        if ts >= cutoff and ts > last_fired_ts.get(sym, -1):
+            last_fired[sym] = disk_fired[sym]
+            last_fired_ts[sym] = ts
+
+    tmp = f"{COOLDOWN_STATE_PATH}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(COOLDOWN_STATE_PATH), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({s: [last_fired[s], ts] for s, ts in last_fired_ts.items()}, f)
+        os.replace(tmp, COOLDOWN_STATE_PATH)
+    except Exception:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+    return last_fired, last_fired_ts
+
+
+def _decide_sized(profile, factors: Dict) -> Decision:
+    """decide_from_factors + apply_sizing for one symbol."""
+    return apply_sizing(decide_from_factors(profile.symbol, profile, factors), profile, factors)
 
-        factors = factors_by_symbol.get(sym, {})
-        d = decide_from_factors(sym, p, factors)
-        d = apply_sizing(d, p, factors)
 
+def run_decisions(profiles: List, factors_by_symbol: Dict[str, Dict]) -> List[Decision]:
+    state = st.session_state
+
+    # Persist cooldown state across Streamlit reruns. Work on local copies and
+    # write back once at the end: plain dict ops in the loop, and a rerun that
+    # dies half way doesn't leave a partial cooldown update behind.
+    if "_last_fired" not in state:
+        # symbol -> "BUY NOW"/"SELL NOW", symbol -> unix seconds
+        state["_last_fired"], state["_last_fired_ts"] = _load_cooldown()
+
+    now = int(time.time())
+
+    # Entries past the cooldown window can't block anything; drop them (with
+    # a margin) so the maps don't grow with every symbol ever fired.
+    cutoff = now - 2 * COOLDOWN_SECS
+    last_fired_ts: Dict[str, int] = {s: ts for s, ts in state["_last_fired_ts"].items() if ts >= cutoff}
+    last_fired: Dict[str, str] = {s: a for s, a in state["_last_fired"].items() if s in last_fired_ts}
+    dirty = len(last_fired_ts) != len(state["_last_fired_ts"])
+
+    # Pass 1: score + size every symbol. This is the per-symbol work; the
+    # execution gate below only concerns the few symbols that want to fire.
+    decisions: List[Decision] = [
+        _decide_sized(p, factors_by_symbol.get(p.symbol, {}))
+        for p in profiles
+    ]
+
+    # Pass 2: Step 4A execution gate + cooldown over fire candidates only
+    for i, d in enumerate(decisions):
         proposed_action = d.action
+        if proposed_action not in FIRE_ACTIONS:
+            continue
+        sym = d.symbol
 
         # --- Step 4A execution gate (setup-aware) ---
-        if proposed_action in ("BUY NOW", "SELL NOW"):
-            min_conf = _step4a_min_confidence(d)
+        min_conf = _step4a_min_confidence(d)
 
-            # 1) Minimum confidence to allow execution (guardrail)
-            if d.confidence < min_conf:
-                setup = str((d.meta or {}).get("setup_type", "SETUP")).title()
-                d = _downgrade_to_wait(
-                    d,
-                    f"{setup} detected but confidence below {min_conf:.1f} (Step 4A)."
-                )
+        # 1) Minimum confidence to allow execution (guardrail)
+        if d.confidence < min_conf:
+            setup = str((d.meta or {}).get("setup_type", "SETUP")).title()
+            d = _downgrade_to_wait(
+                d,
+                f"{setup} detected but confidence below {min_conf:.1f} (Step 4A)."
+            )
 
-            # 2) Cooldown: prevent repeated same-direction firing
-            last_action = last_fired.get(sym)
-            last_ts = last_fired_ts.get(sym, 0)
-            in_window = (now - last_ts) < COOLDOWN_SECS
+        # 2) Cooldown: prevent repeated same-direction firing
+        last_action = last_fired.get(sym)
+        last_ts = last_fired_ts.get(sym, 0)
+        in_window = (now - last_ts) < COOLDOWN_SECS
 
-            if in_window and last_action == proposed_action:
-                d = _downgrade_to_wait(d, "Already fired this direction recently (Step 4A cooldown).")
+        if in_window and last_action == proposed_action:
+            d = _downgrade_to_wait(d, "Already fired this direction recently (Step 4A cooldown).")
 
         # record fires (only if we are still firing)
-        if d.action in ("BUY NOW", "SELL NOW"):
+        if d.action in FIRE_ACTIONS:
             last_fired[sym] = d.action
             last_fired_ts[sym] = now
+            dirty = True
 
-        decisions.append(d)
+        decisions[i] = d
 
+    if dirty:
+        last_fired, last_fired_ts = _save_cooldown(last_fired, last_fired_ts, cutoff)
+    state["_last_fired"] = last_fired
+    state["_last_fired_ts"] = last_fired_ts
     return decisions
@@ -1,6 +1,9 @@
 from __future__ import annotations
+import threading
+from collections import OrderedDict
 from dataclasses import dataclass
 from typing import List, Optional, Literal, Dict, Any
+import numpy as np
 import pandas as pd
 
 
@@ -16,47 +19,60 @@ class FVG:
     end: Any     # timestamp/index
 
 
-def detect_fvgs(df: pd.DataFrame, lookback: int = 160) -> List[FVG]:
+def detect_fvgs(df: pd.DataFrame, lookback: int = 160, symbol: Optional[str] = None) -> List[FVG]:
     """
     Simple 3-candle ICT-style FVG detection:
       Bull FVG: candle i-2 HIGH < candle i LOW  (gap up)
       Bear FVG: candle i-2 LOW  > candle i HIGH (gap down)
 
-    Expects df with columns: ['high','low'] at minimum.
+    Expects df with columns: ['high','low'] at minimum, sorted by time.
+    Pass symbol to memoize the result until the candles change.
     """
     if df is None or df.empty:
         return []
+    if symbol is None:
+        return _detect_fvgs(df, lookback)
+    key = ("detect", symbol, lookback, _frame_fingerprint(df))
+    return list(_memoized(key, lambda: _detect_fvgs(df, lookback)))
 
-    d = df.tail(lookback).copy()
+
+def _detect_fvgs(df: pd.DataFrame, lookback: int) -> List[FVG]:
+    # read-only: no copy needed (the frame may be the shared cached one)
+    d = df.tail(lookback)
     if len(d) < 5:
         return []
 
-    highs = d["high"].values
-    lows = d["low"].values
-    idx = list(d.index)
+    highs = d["high"].to_numpy()
+    lows = d["low"].to_numpy()
+    idx = d.index
+
+    # compare candle i-2 against candle i for every bar at once
+    bull = highs[:-2] < lows[2:]
+    bear = lows[:-2] > highs[2:]
 
     out: List[FVG] = []
-    for i in range(2, len(d)):
+    for j in np.flatnonzero(bull | bear):
+        i = j + 2
         # Bullish gap
-        if highs[i - 2] < lows[i]:
+        if bull[j]:
             out.append(
                 FVG(
                     type="bull",
                     top=float(lows[i]),
-                    bottom=float(highs[i - 2]),
-                    start=idx[i - 2],
+                    bottom=float(highs[j]),
+                    start=idx[j],
                     end=idx[i],
                 )
             )
 
         # Bearish gap
-        if lows[i - 2] > highs[i]:
+        if bear[j]:
             out.append(
                 FVG(
                     type="bear",
-                    top=float(lows[i - 2]),
+                    top=float(lows[j]),
                     bottom=float(highs[i]),
-                    start=idx[i - 2],
+                    start=idx[j],
                     end=idx[i],
                 )
             )
@@ -86,21 +102,27 @@ def nearest_fvg(
     if df is None or df.empty or not fvgs:
         return None
 
-    last_price = float(df["close"].iloc[-1])
+    last_price = float(df["close"].iat[-1])
     pad = max(last_price * pad_frac, 0.0)
 
-    # check most recent first
-    for z in reversed(fvgs):
-        if price_in_zone(last_price, z.top, z.bottom, pad=pad):
-            return {
-                "type": z.type,
-                "top": z.top,
-                "bottom": z.bottom,
-                "start": z.start,
-                "end": z.end,
-                "last_price": last_price,
-                "pad": pad,
-            }
+    # check every zone at once, then take the most recent hit
+    tops = np.fromiter((z.top for z in fvgs), dtype=float, count=len(fvgs))
+    bottoms = np.fromiter((z.bottom for z in fvgs), dtype=float, count=len(fvgs))
+    hits = np.flatnonzero(
+        (np.minimum(tops, bottoms) - pad <= last_price)
+        & (last_price <= np.maximum(tops, bottoms) + pad)
+    )
+    if hits.size:
+        z = fvgs[hits[-1]]
+        return {
+            "type": z.type,
+            "top": z.top,
+            "bottom": z.bottom,
+            "start": z.start,
+            "end": z.end,
+            "last_price": last_price,
+            "pad": pad,
+        }
     return None
 
 from typing import Tuple
@@ -115,8 +137,6 @@ def _is_touched_or_filled(df: pd.DataFrame, z) -> Tuple[bool, bool]:
     touched: price has entered the zone after it formed
     filled:  price has traded through to the far side of the zone
     """
-    lo, hi = _zone_bounds(z)
-
     # slice from the zone start onward (be safe if index types differ)
     try:
         d2 = df.loc[z.start:]
@@ -126,6 +146,7 @@ def _is_touched_or_filled(df: pd.DataFrame, z) -> Tuple[bool, bool]:
     if d2 is None or d2.empty:
         return False, False
 
+    lo, hi = _zone_bounds(z)
     lows = d2["low"]
     highs = d2["high"]
 
@@ -138,9 +159,51 @@ def _is_touched_or_filled(df: pd.DataFrame, z) -> Tuple[bool, bool]:
 
     return touched, filled
 
-def _freshness_weight(age_bars: int) -> float:
-    # Newer zones score higher; fades out by ~60 bars
-    return max(0.0, 1.0 - (age_bars / 60.0))
+def _float_values(s: pd.Series) -> np.ndarray:
+    # live_data hands out float32 OHLC; keep it (no float64 copy), and only
+    # cast columns that aren't floating point at all.
+    a = s.to_numpy()
+    return a if a.dtype.kind == "f" else a.astype(np.float64)
+
+
+def _start_positions(index: pd.Index, fvgs: List[FVG]) -> List[int]:
+    starts = [z.start for z in fvgs]
+    if index.is_unique:
+        return index.get_indexer(starts).tolist()
+    # duplicate timestamps: first occurrence, like list.index
+    first: Dict[Any, int] = {}
+    for i, ts in enumerate(index):
+        first.setdefault(ts, i)
+    return [first.get(s, -1) for s in starts]
+
+
+# Asset-detail reruns without a new bar hand detect_fvgs the same candles
+# again. Results are kept per (symbol, lookback, frame fingerprint); the
+# fingerprint is the frame's length, first/last timestamp and last bar, which
+# changes whenever a bar is added or the live bar updates.
+FVG_CACHE_MAX = 128
+_FVG_CACHE: "OrderedDict[tuple, Any]" = OrderedDict()
+_FVG_CACHE_LOCK = threading.Lock()
+
+
+def _frame_fingerprint(df: pd.DataFrame) -> tuple:
+    last = df.iloc[-1]
+    return (len(df), df.index[0], df.index[-1], tuple(last.tolist()))
+
+
+def _memoized(key: tuple, compute):
+    with _FVG_CACHE_LOCK:
+        out = _FVG_CACHE.get(key)
+        if out is not None:
+            _FVG_CACHE.move_to_end(key)
+            return out
+    out = compute()
+    with _FVG_CACHE_LOCK:
+        _FVG_CACHE[key] = out
+        if len(_FVG_CACHE) > FVG_CACHE_MAX:
+            _FVG_CACHE.popitem(last=False)
+    return out
+
 
 def compute_fvg_context(
     df: pd.DataFrame,
@@ -160,6 +223,10 @@ def compute_fvg_context(
     if df is None or df.empty or len(df) < 10:
         return out
 
+    # live_data already sorts on ingest; this is just a flag check then
+    if not df.index.is_monotonic_increasing:
+        df = df.sort_index()
+
     fvgs = detect_fvgs(df, lookback=lookback)
     if not fvgs:
         return out
@@ -169,55 +236,53 @@ def compute_fvg_context(
 
     # last price (support either "close" or "Close")
     if "close" in df.columns:
-        last_price = float(df["close"].iloc[-1])
+        last_price = float(df["close"].iat[-1])
     else:
-        last_price = float(df["Close"].iloc[-1])
+        last_price = float(df["Close"].iat[-1])
 
     pad = last_price * (pad_bps / 10000.0)  # bps → decimal
-    best = 0.0
-
-    # bar positions for "freshness"
-    idx_list = list(df.index)
-
-    for z in fvgs:
-        lo, hi = _zone_bounds(z)
-
-        # proximity → 0..1
-        inside = (lo - pad) <= last_price <= (hi + pad)
-        if inside:
-            prox = 1.0
-            out["near_fvg"] = True
-        else:
-            # distance outside zone (0 = at boundary)
-            dist = min(abs(last_price - lo), abs(last_price - hi))
-            prox = max(0.0, 1.0 - (dist / (pad * 2.0)))  # fades quickly
-
-        # size → 0..1 (relative to price, capped)
-        gap = max(0.0, hi - lo)
-        size = min(1.0, (gap / max(1e-9, last_price)) * 200.0)  # ~0.5% gap ≈ 1.0
-
-        # freshness → 0..1
-        try:
-            start_pos = idx_list.index(z.start)
-            age_bars = len(idx_list) - 1 - start_pos
-        except Exception:
-            age_bars = 60
-        fresh = _freshness_weight(age_bars)
-
-        # touched/filled → penalty
-        touched, filled = _is_touched_or_filled(df, z)
-        if filled:
-            life = 0.0
-        elif touched:
-            life = 0.5
-        else:
-            life = 1.0
-
-        # combine → 0..~3
-        score = (1.2 * prox) + (0.9 * fresh) + (0.9 * size)
-        score *= life
-
-        best = max(best, score)
+
+    # All zones are scored together as arrays (one element per zone).
+    bounds = np.array([_zone_bounds(z) for z in fvgs], dtype=float)
+    lo, hi = bounds[:, 0], bounds[:, 1]
+    is_bull = np.array([z.type == "bull" for z in fvgs])
+
+    # bar positions for "freshness" (-1 = start not found in df)
+    n_bars = len(df.index)
+    start_pos = np.asarray(_start_positions(df.index, fvgs), dtype=np.int64)
+    found = start_pos >= 0
+
+    # proximity → 0..1 (distance outside zone fades quickly; 0 = at boundary)
+    inside = ((lo - pad) <= last_price) & (last_price <= (hi + pad))
+    dist = np.minimum(np.abs(last_price - lo), np.abs(last_price - hi))
+    prox = np.where(inside, 1.0, np.maximum(0.0, 1.0 - (dist / (pad * 2.0))))
+    out["near_fvg"] = bool(inside.any())
+
+    # size → 0..1 (relative to price, capped; ~0.5% gap ≈ 1.0)
+    gap = np.maximum(0.0, hi - lo)
+    size = np.minimum(1.0, (gap / max(1e-9, last_price)) * 200.0)
+
+    # freshness → 0..1: newer zones score higher; fades out by ~60 bars
+    age_bars = np.where(found, n_bars - 1 - start_pos, 60)
+    fresh = np.maximum(0.0, 1.0 - (age_bars / 60.0))
+
+    # touched/filled → penalty. Lowest low / highest high from each bar to the
+    # end, so this is a lookup per zone instead of a slice + reduction (df is
+    # sorted, so df.loc[start:] is df.iloc[pos:]).
+    suffix_min_low = np.fmin.accumulate(_float_values(df["low"])[::-1])[::-1]
+    suffix_max_high = np.fmax.accumulate(_float_values(df["high"])[::-1])[::-1]
+    pos = np.where(found, start_pos, 0)
+    min_low = suffix_min_low[pos]
+    max_high = suffix_max_high[pos]
+    touched = np.where(is_bull, min_low <= hi, max_high >= lo)
+    filled = np.where(is_bull, min_low <= lo, max_high >= hi)
+    for i in np.flatnonzero(~found):
+        touched[i], filled[i] = _is_touched_or_filled(df, fvgs[i])
+    life = np.where(filled, 0.0, np.where(touched, 0.5, 1.0))
+
+    # combine → 0..~3
+    score = ((1.2 * prox) + (0.9 * fresh) + (0.9 * size)) * life
+    best = max(0.0, float(score.max()))
 
     out["fvg_score"] = round(best, 3)
     out["debug"] = {"pad": pad, "last_price": last_price}
@@ -2,7 +2,15 @@
 from __future__ import annotations
 
 import time
-from typing import Dict, Any, List, Optional
+from collections import deque
+from typing import Dict, Any, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from engine.scoring import FIRE_ACTIONS
+
+
+EQUITY_CURVE_MAX = 500  # points kept in portfolio["equity_curve"]
 
 
 def _now_ts() -> int:
@@ -34,15 +42,16 @@ def init_portfolio_state(state, starting_equity: float = 10000.0) -> None:
             "unrealized_pnl": 0.0,
             "open_positions": [],   # list of dicts
             "closed_trades": [],    # list of dicts
-            "equity_curve": [],     # list of dicts (t, equity)
+            "equity_curve": deque(maxlen=EQUITY_CURVE_MAX),  # dicts (t, equity)
         }
 
 
-def _find_open_position(open_positions: List[Dict[str, Any]], symbol: str) -> Optional[Dict[str, Any]]:
+def _index_open_positions(open_positions: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """symbol -> open position (first one, if a symbol is listed twice)."""
+    by_symbol: Dict[str, Dict[str, Any]] = {}
     for pos in open_positions:
-        if pos.get("symbol") == symbol:
-            return pos
-    return None
+        by_symbol.setdefault(pos.get("symbol"), pos)
+    return by_symbol
 
 
 def _remove_open_position(open_positions: List[Dict[str, Any]], symbol: str) -> None:
@@ -52,13 +61,18 @@ def _remove_open_position(open_positions: List[Dict[str, Any]], symbol: str) ->
 def _last_price_from_factors(factors: Dict[str, Any]) -> Optional[float]:
     """
     Tries:
-      - factors["df"]["close"].iloc[-1]
+      - factors["last_close"] (precomputed by the app at ingest)
+      - factors["df"]["close"].iat[-1]
       - factors["entry"]
     """
+    last_close = factors.get("last_close")
+    if last_close is not None:
+        return last_close
+
     df = factors.get("df")
     try:
         if df is not None and hasattr(df, "__getitem__") and "close" in df:
-            return float(df["close"].iloc[-1])
+            return float(df["close"].iat[-1])
     except Exception:
         pass
 
@@ -66,41 +80,86 @@ def _last_price_from_factors(factors: Dict[str, Any]) -> Optional[float]:
 
 
 def _bar_hl_from_factors(factors: Dict[str, Any]) -> tuple[Optional[float], Optional[float]]:
+    if factors.get("last_high") is not None and factors.get("last_low") is not None:
+        return factors["last_high"], factors["last_low"]
+
     df = factors.get("df")
     try:
         if df is not None and "high" in df and "low" in df:
-            return float(df["high"].iloc[-1]), float(df["low"].iloc[-1])
+            return float(df["high"].iat[-1]), float(df["low"].iat[-1])
     except Exception:
         pass
     return None, None
 
 
-def _calc_unrealized(pos: Dict[str, Any], last_price: float) -> float:
-    side = (pos.get("side") or "").lower()
-    entry = _to_float(pos.get("entry"), default=0.0) or 0.0
-    size = _to_float(pos.get("size"), default=0.0) or 0.0
+_SIDE_SIGN = {"buy": 1, "sell": -1}
+
+
+def _side_sign(pos: Dict[str, Any]) -> int:
+    """+1 buy, -1 sell, 0 unknown. Stored at open; older positions fall back to "side"."""
+    sign = pos.get("side_sign")
+    if sign is None:
+        sign = _SIDE_SIGN.get((pos.get("side") or "").lower(), 0)
+    return sign
 
-    if side == "buy":
-        return (last_price - entry) * size
-    if side == "sell":
-        return (entry - last_price) * size
-    return 0.0
+
+class PositionArrays(NamedTuple):
+    """
+    Column view of a list of open-position dicts (one row per position).
+    The dicts stay the stored form (session state, portfolio panel); this is
+    built per pass so the numeric work runs over arrays.
+    """
+    entry: np.ndarray   # float64
+    size: np.ndarray    # float64
+    side: np.ndarray    # int8: +1 buy, -1 sell, 0 unknown
+    stop: np.ndarray    # float64, NaN when unset
+    tp1: np.ndarray     # float64, NaN when unset
+
+
+def _nan_if_none(x: Optional[float]) -> float:
+    return np.nan if x is None else x
+
+
+def _position_arrays(positions: List[Dict[str, Any]]) -> PositionArrays:
+    n = len(positions)
+
+    def col(key: str, default: Optional[float]) -> np.ndarray:
+        return np.fromiter(
+            (_nan_if_none(_to_float(pos.get(key), default=default)) for pos in positions), dtype=np.float64, count=n
+        )
+
+    return PositionArrays(
+        entry=col("entry", 0.0),
+        size=col("size", 0.0),
+        side=np.fromiter((_side_sign(pos) for pos in positions), dtype=np.int8, count=n),
+        stop=col("stop", None),
+        tp1=col("tp1", None),
+    )
+
+
+def _mark_to_market(marks: List[Tuple[Dict[str, Any], float]]) -> float:
+    """
+    Unrealized PnL for all (position, last_price) pairs in one array pass.
+    Writes pos["unrealized_pnl"] and returns the total.
+    """
+    if not marks:
+        return 0.0
+    arr = _position_arrays([pos for pos, _ in marks])
+    last = np.fromiter((px for _, px in marks), dtype=np.float64, count=len(marks))
+
+    pnls = (last - arr.entry) * arr.size * arr.side
+    for (pos, _), pnl in zip(marks, pnls.tolist()):
+        pos["unrealized_pnl"] = pnl
+    return float(pnls.sum())
 
 
 def _close_position(portfolio: Dict[str, Any], pos: Dict[str, Any], exit_price: float, reason: str) -> None:
     """
     Realize PnL, move to closed_trades, remove from open_positions.
     """
-    side = (pos.get("side") or "").lower()
     entry = _to_float(pos.get("entry"), default=0.0) or 0.0
     size = _to_float(pos.get("size"), default=0.0) or 0.0
-
-    if side == "buy":
-        realized = (exit_price - entry) * size
-    elif side == "sell":
-        realized = (entry - exit_price) * size
-    else:
-        realized = 0.0
+    realized = (exit_price - entry) * size * _side_sign(pos)
 
     trade = {
         "symbol": pos.get("symbol"),
@@ -141,128 +200,94 @@ def update_portfolio(state, decisions: List[Any], factors_by_symbol: Dict[str, D
 
     open_positions: List[Dict[str, Any]] = p.get("open_positions", [])
     closed_trades: List[Dict[str, Any]] = p.get("closed_trades", [])
-    equity_curve: List[Dict[str, Any]] = p.get("equity_curve", [])
+    equity_curve = p.get("equity_curve", [])
+    if not isinstance(equity_curve, deque) or equity_curve.maxlen != EQUITY_CURVE_MAX:
+        # older sessions / panel reset store a plain list
+        equity_curve = deque(equity_curve, maxlen=EQUITY_CURVE_MAX)
+
+    # Latest price / bar range per symbol, read once for both passes below
+    last_prices = {sym: _last_price_from_factors(f) for sym, f in factors_by_symbol.items()}
+    bar_hls = {sym: _bar_hl_from_factors(f) for sym, f in factors_by_symbol.items()}
 
     # --- 1) Mark-to-market & stop/tp checks ---
-    total_unreal = 0.0
-    # Work on a copy so we can close while iterating
-    for pos in list(open_positions):
-        sym = pos.get("symbol")
-        factors = factors_by_symbol.get(sym, {})
-        last_price = _last_price_from_factors(factors)
-        if last_price is None:
+    # Only positions with a price this pass are checked/marked.
+    live = [(pos, last_prices.get(pos.get("symbol"))) for pos in open_positions]
+    live = [(pos, px) for pos, px in live if px is not None]
+
+    # stop / tp check using last bar high/low (simple), for all positions at once.
+    # NaN (no bar, no stop/tp1) compares False, so those never trigger.
+    arr = _position_arrays([pos for pos, _ in live])
+    n = len(live)
+    bar_high = np.fromiter((_nan_if_none(bar_hls[pos.get("symbol")][0]) for pos, _ in live), dtype=np.float64, count=n)
+    bar_low = np.fromiter((_nan_if_none(bar_hls[pos.get("symbol")][1]) for pos, _ in live), dtype=np.float64, count=n)
+    tp1_done = np.fromiter((bool(pos.get("tp1_hit", False)) for pos, _ in live), dtype=bool, count=n)
+    is_buy = arr.side > 0
+    is_sell = arr.side < 0
+    stop_hit = (is_buy & (bar_low <= arr.stop)) | (is_sell & (bar_high >= arr.stop))
+    # tp2 kept for display; we close full at tp1 for now (simple)
+    tp1_hit = ~stop_hit & ~tp1_done & ((is_buy & (bar_high >= arr.tp1)) | (is_sell & (bar_low <= arr.tp1)))
+
+    marks: List[Tuple[Dict[str, Any], float]] = []  # survivors, priced in one pass below
+    for i, (pos, last_price) in enumerate(live):
+        if stop_hit[i]:
+            _close_position(p, pos, float(arr.stop[i]), "STOP")
             continue
 
-        # stop / tp check using last bar high/low (simple)
-        bar_high, bar_low = _bar_hl_from_factors(factors)
-        stop = _to_float(pos.get("stop"), default=None)
-        tp1 = _to_float(pos.get("tp1"), default=None)
-        # tp2 kept for display; we close full at tp1 for now (simple)
-
-        side = (pos.get("side") or "").lower()
-
-        # If we have high/low, use them for hit detection
-        if bar_high is not None and bar_low is not None:
-            if side == "buy":
-                if stop is not None and bar_low <= stop:
-                    _close_position(p, pos, stop, "STOP")
+        if tp1_hit[i]:
+            # Partial take-profit at TP1: close half, move stop to breakeven
+            tp1 = float(arr.tp1[i])
+            entry_px = float(pos.get("entry") or 0.0)
+            size_now = float(pos.get("size") or 0.0)
+
+            if size_now > 0:
+                take_size = size_now * 0.5
+                realized = (tp1 - entry_px) * take_size * int(arr.side[i])
+
+                # record partial trade
+                closed_trades.append({
+                    "symbol": pos.get("symbol"),
+                    "side": pos.get("side"),
+                    "size": take_size,
+                    "entry": entry_px,
+                    "exit": tp1,
+                    "pnl": float(realized),
+                    "opened_at": pos.get("opened_at"),
+                    "closed_at": _now_ts(),
+                    "reason": "TP1_PARTIAL",
+                })
+
+                p["realized_pnl"] = float(p.get("realized_pnl", 0.0)) + float(realized)
+                pos["size"] = size_now - take_size
+                pos["tp1_hit"] = True
+
+                # Move stop to breakeven (entry)
+                pos["stop"] = entry_px
+
+                # If we accidentally sized to ~0, fully close
+                if float(pos["size"]) <= 0:
+                    _close_position(p, pos, tp1, "TP1_FULL")
                     continue
 
-                if tp1 is not None and bar_high >= tp1 and not pos.get("tp1_hit", False):
-                    # Partial take-profit at TP1: close half, move stop to breakeven
-                    entry_px = float(pos.get("entry") or 0.0)
-                    size_now = float(pos.get("size") or 0.0)
-
-                    if size_now > 0:
-                        take_size = size_now * 0.5
-                        realized = (tp1 - entry_px) * take_size
-
-                        # record partial trade
-                        closed_trades.append({
-                            "symbol": pos.get("symbol"),
-                            "side": pos.get("side"),
-                            "size": take_size,
-                            "entry": entry_px,
-                            "exit": float(tp1),
-                            "pnl": float(realized),
-                            "opened_at": pos.get("opened_at"),
-                            "closed_at": _now_ts(),
-                            "reason": "TP1_PARTIAL",
-                        })
-
-                        p["realized_pnl"] = float(p.get("realized_pnl", 0.0)) + float(realized)
-                        pos["size"] = size_now - take_size
-                        pos["tp1_hit"] = True
-
-                        # Move stop to breakeven (entry)
-                        pos["stop"] = entry_px
-
-                        # If we accidentally sized to ~0, fully close
-                        if float(pos["size"]) <= 0:
-                            _close_position(p, pos, float(tp1), "TP1_FULL")
-                            continue
-
-            elif side == "sell":
-                if stop is not None and bar_high >= stop:
-                    _close_position(p, pos, stop, "STOP")
-                    continue
-
-                if tp1 is not None and bar_low <= tp1 and not pos.get("tp1_hit", False):
-                    # Partial take-profit at TP1: close half, move stop to breakeven
-                    entry_px = float(pos.get("entry") or 0.0)
-                    size_now = float(pos.get("size") or 0.0)
-
-                    if size_now > 0:
-                        take_size = size_now * 0.5
-                        realized = (entry_px - tp1) * take_size  # sell pnl
-
-                        closed_trades.append({
-                            "symbol": pos.get("symbol"),
-                            "side": pos.get("side"),
-                            "size": take_size,
-                            "entry": entry_px,
-                            "exit": float(tp1),
-                            "pnl": float(realized),
-                            "opened_at": pos.get("opened_at"),
-                            "closed_at": _now_ts(),
-                            "reason": "TP1_PARTIAL",
-                        })
-
-                        p["realized_pnl"] = float(p.get("realized_pnl", 0.0)) + float(realized)
-                        pos["size"] = size_now - take_size
-                        pos["tp1_hit"] = True
-
-                        # Move stop to breakeven (entry)
-                        pos["stop"] = entry_px
-
-                        if float(pos["size"]) <= 0:
-                            _close_position(p, pos, float(tp1), "TP1_FULL")
-                            continue
-
-
         # otherwise unrealized
-        unreal = _calc_unrealized(pos, last_price)
-        pos["unrealized_pnl"] = float(unreal)
-        total_unreal += float(unreal)
+        marks.append((pos, last_price))
 
-    p["unrealized_pnl"] = float(total_unreal)
+    p["unrealized_pnl"] = _mark_to_market(marks)
     p["equity"] = float(p.get("starting_equity", 0.0)) + float(p.get("realized_pnl", 0.0)) + float(p.get("unrealized_pnl", 0.0))
 
-    # record equity curve point (lightweight)
+    # record equity curve point (lightweight); the deque drops the oldest past EQUITY_CURVE_MAX
     equity_curve.append({"t": _now_ts(), "equity": float(p["equity"])})
-    # keep last 500 points
-    if len(equity_curve) > 500:
-        del equity_curve[:-500]
 
     # --- 2) Process new decisions (open/close on signals) ---
+    # open_positions stays a list (panel + session state); index it once for lookups
+    open_by_symbol = _index_open_positions(open_positions)
     for d in decisions:
         sym = getattr(d, "symbol", None)
         action = getattr(d, "action", None)
-        if not sym or action not in ("BUY NOW", "SELL NOW"):
+        if not sym or action not in FIRE_ACTIONS:
             continue
 
         factors = factors_by_symbol.get(sym, {})
-        last_price = _last_price_from_factors(factors)
+        last_price = last_prices.get(sym)
         trade_plan = getattr(d, "trade_plan", {}) or {}
 
         # Normalize fields
@@ -277,7 +302,7 @@ def update_portfolio(state, decisions: List[Any], factors_by_symbol: Dict[str, D
         risk_pct = _to_float(getattr(d, "risk_pct", 0.0), default=0.0) or 0.0
         confidence = _to_float(getattr(d, "confidence", 0.0), default=0.0) or 0.0
 
-        existing = _find_open_position(open_positions, sym)
+        existing = open_by_symbol.get(sym)
         
         # --- Step 8B: open / reverse on new signal ---
 
@@ -287,6 +312,7 @@ def update_portfolio(state, decisions: List[Any], factors_by_symbol: Dict[str, D
             if existing.get("side") != side:
                 exit_px = float(last_price if last_price is not None else entry if entry is not None else 0.0)
                 _close_position(p, existing, exit_px, "REVERSE")
+                del open_by_symbol[sym]
                 existing = None
             else:
                 # Same-direction signal while already in position -> ignore
@@ -303,6 +329,7 @@ def update_portfolio(state, decisions: List[Any], factors_by_symbol: Dict[str, D
         pos = {
             "symbol": sym,
             "side": side,                 # "buy" / "sell"
+            "side_sign": _SIDE_SIGN[side],
             "size": float(size),
             "entry": float(entry),
             "stop": float(stop),
@@ -315,30 +342,9 @@ def update_portfolio(state, decisions: List[Any], factors_by_symbol: Dict[str, D
             "unrealized_pnl": 0.0,
         }
         
+        # no open record for sym here: either none existed or the reverse above closed it
         open_positions.append(pos)
-
-        # Open new position (only if we have at least entry and size)
-        if entry is None or size <= 0:
-            # Can't open; just skip quietly
-            continue
-
-        new_pos = {
-            "symbol": sym,
-            "side": side,
-            "size": float(size),
-            "entry": float(entry),
-            "stop": stop,
-            "tp1": tp1,
-            "tp2": tp2,
-            "opened_at": _now_ts(),
-            "unrealized_pnl": 0.0,
-            "confidence": float(confidence),
-            "risk_pct": float(risk_pct),
-        }
-
-        # replace any stale position record for symbol, then append
-        _remove_open_position(open_positions, sym)
-        open_positions.append(new_pos)
+        open_by_symbol[sym] = pos
 
     # Re-assign to ensure state reflects latest lists
     p["open_positions"] = open_positions
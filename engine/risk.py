@@ -1,63 +1,69 @@
 # engine/risk.py
 from __future__ import annotations
 
+from bisect import bisect_right
 from dataclasses import is_dataclass
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+from weakref import WeakKeyDictionary
 
-def clamp(x: float, lo: float, hi: float) -> float:
-    return max(lo, min(hi, x))
+from engine.scoring import clamp
+
+_EQUITY_ATTRS = ("equity", "account_equity", "balance", "account_balance")
+
+# profile -> the _EQUITY_ATTRS it actually has; probed once per profile object
+_EQUITY_ATTRS_BY_PROFILE: "WeakKeyDictionary[Any, Tuple[str, ...]]" = WeakKeyDictionary()
+
+def _profile_equity_attrs(profile) -> Tuple[str, ...]:
+    try:
+        return _EQUITY_ATTRS_BY_PROFILE[profile]
+    except (KeyError, TypeError):
+        pass
+    names = tuple(name for name in _EQUITY_ATTRS if hasattr(profile, name))
+    try:
+        _EQUITY_ATTRS_BY_PROFILE[profile] = names
+    except TypeError:
+        pass  # unhashable / not weak-referenceable: just probe every time
+    return names
 
 def _get_equity(profile, default_equity: float = 10000.0) -> float:
-    for name in ("equity", "account_equity", "balance", "account_balance"):
-        if hasattr(profile, name):
-            try:
-                v = float(getattr(profile, name))
-                if v > 0:
-                    return v
-            except Exception:
-                pass
+    for name in _profile_equity_attrs(profile):
+        try:
+            v = float(getattr(profile, name))
+            if v > 0:
+                return v
+        except Exception:
+            pass
     return float(default_equity)
 
+# Risk per trade as fraction of equity (0.0025 = 0.25%), by decision mode
+_MODE_BASE_RISK_PCT: Dict[str, float] = {
+    # Your engine modes
+    "standby": 0.0,
+    "sniper": 0.0025,        # 0.25%
+    "continuation": 0.0020,  # slightly lower by default
+    # Optional "style" modes (if you add them later)
+    "conservative": 0.0025,
+    "balanced": 0.0050,
+    "aggressive": 0.0075,
+}
+
+_VOLATILITY_MULT: Dict[str, float] = {"high": 0.6, "extreme": 0.25}
+
 def _mode_base_risk_pct(mode: str) -> float:
     """
     Risk per trade as fraction of equity (0.0025 = 0.25%)
     """
-    m = (mode or "").lower()
-
-    # Your engine modes
-    if m == "standby":
-        return 0.0
-    if m == "sniper":
-        return 0.0025   # 0.25%
-    if m == "continuation":
-        return 0.0020   # slightly lower by default
-
-    # Optional "style" modes (if you add them later)
-    if m == "conservative":
-        return 0.0025
-    if m == "balanced":
-        return 0.0050
-    if m == "aggressive":
-        return 0.0075
-
-    return 0.0025
+    return _MODE_BASE_RISK_PCT.get((mode or "").lower(), 0.0025)
 
 def _volatility_mult(vol_risk: str) -> float:
-    v = (vol_risk or "normal").lower()
-    if v == "high":
-        return 0.6
-    if v == "extreme":
-        return 0.25
-    return 1.0
+    return _VOLATILITY_MULT.get((vol_risk or "normal").lower(), 1.0)
+
+# confidence < 5.0 -> 0.0, < 7.0 -> 0.6, < 7.8 -> 0.9, else 1.0
+_CONFIDENCE_STEPS = (5.0, 7.0, 7.8)
+_CONFIDENCE_MULTS = (0.0, 0.6, 0.9, 1.0)
 
 def _confidence_mult(confidence: float) -> float:
-    if confidence < 5.0:
-        return 0.0
-    if confidence < 7.0:
-        return 0.6
-    if confidence < 7.8:
-        return 0.9
-    return 1.0
+    return _CONFIDENCE_MULTS[bisect_right(_CONFIDENCE_STEPS, confidence)]
 
 def apply_sizing(decision, profile, factors: Dict[str, Any], default_equity: float = 10000.0):
     """
@@ -67,6 +73,9 @@ def apply_sizing(decision, profile, factors: Dict[str, Any], default_equity: flo
       - decision.meta (merged sizing details)
     Also merges into trade_plan when possible.
     """
+    if not is_dataclass(decision):
+        return decision
+
     entry = factors.get("entry", None)
     stop = factors.get("stop", None)
     try:
@@ -80,10 +89,10 @@ def apply_sizing(decision, profile, factors: Dict[str, Any], default_equity: flo
         return decision
 
     equity = _get_equity(profile, default_equity=default_equity)
-    confidence = float(getattr(decision, "confidence", 0.0))
-    score = float(getattr(decision, "score", confidence))
+    confidence = float(decision.confidence)
+    score = float(decision.score)
 
-    base_risk = _mode_base_risk_pct(getattr(decision, "mode", "sniper"))
+    base_risk = _mode_base_risk_pct(decision.mode)
     conf_mult = _confidence_mult(confidence)
     score_mult = clamp(score / 10.0, 0.6, 1.1)
     vol_mult = _volatility_mult(factors.get("volatility_risk", "normal"))
@@ -94,7 +103,7 @@ def apply_sizing(decision, profile, factors: Dict[str, Any], default_equity: flo
     risk_amt = equity * risk_pct
     size = (risk_amt / stop_dist) if stop_dist else 0.0
 
-    tp = getattr(decision, "trade_plan", {}) or {}
+    tp = decision.trade_plan or {}
     if isinstance(tp, dict):
         tp = dict(tp)
         tp.update({
@@ -116,11 +125,8 @@ def apply_sizing(decision, profile, factors: Dict[str, Any], default_equity: flo
         }
     }
 
-    if not is_dataclass(decision):
-        return decision
-
     # IMPORTANT: merge meta instead of overwriting it
-    existing_meta = getattr(decision, "meta", {}) or {}
+    existing_meta = decision.meta or {}
     if not isinstance(existing_meta, dict):
         existing_meta = {}
 
@@ -10,8 +10,11 @@ EXECUTION_CONFIDENCE_MIN = 8.0
 
 MIN_RR = 2.0
 
+# Actions that mean "execute now"; everything else is informational.
+FIRE_ACTIONS = frozenset({"BUY NOW", "SELL NOW"})
 
-@dataclass
+
+@dataclass(slots=True)
 class Decision:
     symbol: str
     bias: str
@@ -32,6 +35,19 @@ def clamp(x: float, lo: float, hi: float) -> float:
     return max(lo, min(hi, x))
 
 
+# Boolean factor keys read by build_score_breakdown, in unpacking order.
+_BREAKDOWN_FLAGS = (
+    "po3_active",
+    "liquidity_sweep",
+    "agreement_reclaim",
+    "mss_shift",
+    "session_alignment",
+    "htf_alignment",
+    "distribution_active",
+)
+_ENTRY_CONFIRM_FLAGS = ("entry_confirmed_sniper", "entry_confirmed_continuation", "entry_confirmed")
+
+
 def build_score_breakdown(profile, factors: Dict) -> Dict[str, float]:
     """
     PO3 confidence model (max 10):
@@ -48,20 +64,19 @@ def build_score_breakdown(profile, factors: Dict) -> Dict[str, float]:
     NOTE:
       Sniper clean +1.0 is NOT added here — it's applied only at sniper execution check.
     """
-    po3_active = bool(factors.get("po3_active", False))
-    liquidity_sweep = bool(factors.get("liquidity_sweep", False))
-    agreement_reclaim = bool(factors.get("agreement_reclaim", False))
-    mss_shift = bool(factors.get("mss_shift", False))
-    session_alignment = bool(factors.get("session_alignment", False))
-    htf_alignment = bool(factors.get("htf_alignment", False))
-    distribution_active = bool(factors.get("distribution_active", False))
+    get = factors.get
+    (
+        po3_active,
+        liquidity_sweep,
+        agreement_reclaim,
+        mss_shift,
+        session_alignment,
+        htf_alignment,
+        distribution_active,
+    ) = [bool(get(k, False)) for k in _BREAKDOWN_FLAGS]
 
     # Prefer setup-specific confirmations if present, else generic
-    entry_confirmed_any = bool(
-        factors.get("entry_confirmed_sniper", False)
-        or factors.get("entry_confirmed_continuation", False)
-        or factors.get("entry_confirmed", False)
-    )
+    entry_confirmed_any = any(get(k, False) for k in _ENTRY_CONFIRM_FLAGS)
 
     po3_score = 2.0 if po3_active else 0.0
     sweep_score = 2.0 if liquidity_sweep else 0.0
@@ -106,44 +121,55 @@ def build_score_breakdown(profile, factors: Dict) -> Dict[str, float]:
     }
 
 
+def _trade_plan(factors: Dict, rr: float) -> Dict:
+    return {
+        "entry": factors.get("entry", "TBD"),
+        "stop": factors.get("stop", "TBD"),
+        "tp1": factors.get("tp1", "TBD"),
+        "tp2": factors.get("tp2", "TBD"),
+        "rr": rr,
+    }
+
+
 def decide_from_factors(symbol: str, profile, factors: Dict) -> Decision:
-    po3_bias = factors.get("po3_bias", factors.get("bias", "neutral"))
-    rr = float(factors.get("rr", 0.0))
+    get = factors.get
+    po3_bias = get("po3_bias", get("bias", "neutral"))
+    rr = float(get("rr", 0.0))
 
     # News = warning only, never blocks
-    news_block = bool(factors.get("news_block", False))
+    news_block = bool(get("news_block", False))
     news_note = " ⚠️ News risk: high-impact events nearby." if news_block else ""
 
     # Session flags
-    session_valid_sniper = bool(factors.get("session_valid_sniper", True))
-    session_valid_continuation = bool(factors.get("session_valid_continuation", True))
+    session_valid_sniper = bool(get("session_valid_sniper", True))
+    session_valid_continuation = bool(get("session_valid_continuation", True))
 
-    po3_phase = str(factors.get("po3_phase", "ACCUMULATION")).upper()
-    accumulation_detected = bool(factors.get("accumulation_detected", False))
-    liquidity_sweep = bool(factors.get("liquidity_sweep", False))
-    agreement_reclaim = bool(factors.get("agreement_reclaim", False))
-    mss_shift = bool(factors.get("mss_shift", False))
+    po3_phase = str(get("po3_phase", "ACCUMULATION")).upper()
+    accumulation_detected = bool(get("accumulation_detected", False))
+    liquidity_sweep = bool(get("liquidity_sweep", False))
+    agreement_reclaim = bool(get("agreement_reclaim", False))
+    mss_shift = bool(get("mss_shift", False))
 
-    htf_alignment = bool(factors.get("htf_alignment", False))
-    distribution_active = bool(factors.get("distribution_active", False))
+    htf_alignment = bool(get("htf_alignment", False))
+    distribution_active = bool(get("distribution_active", False))
 
     # Continuation structure (fallback to old structure_ok if missing)
-    structure_ok = bool(factors.get("structure_ok", False))
-    structure_ok_cont = bool(factors.get("structure_ok_continuation", structure_ok))
+    structure_ok = bool(get("structure_ok", False))
+    structure_ok_cont = bool(get("structure_ok_continuation", structure_ok))
 
     # Setup-correct entry confirmation
     entry_confirmed_sniper = bool(
-        factors.get("entry_confirmed_sniper", factors.get("entry_confirmed", False))
+        get("entry_confirmed_sniper", get("entry_confirmed", False))
     )
     entry_type_sniper = str(
-        factors.get("entry_confirm_type_sniper", factors.get("entry_confirm_type", "none"))
+        get("entry_confirm_type_sniper", get("entry_confirm_type", "none"))
     )
 
     entry_confirmed_cont = bool(
-        factors.get("entry_confirmed_continuation", factors.get("entry_confirmed", False))
+        get("entry_confirmed_continuation", get("entry_confirmed", False))
     )
     entry_type_cont = str(
-        factors.get("entry_confirm_type_continuation", factors.get("entry_confirm_type", "none"))
+        get("entry_confirm_type_continuation", get("entry_confirm_type", "none"))
     )
 
     # Base score (includes distribution bonus)
@@ -151,7 +177,7 @@ def decide_from_factors(symbol: str, profile, factors: Dict) -> Decision:
     confidence = float(score_breakdown["total_score"])
 
     # ✅ Sniper-only clean bonus (+1.0) applied ONLY for sniper execution checks
-    sniper_clean = bool(factors.get("sniper_clean", False))
+    sniper_clean = bool(get("sniper_clean", False))
     sniper_bonus = 1.0 if sniper_clean else 0.0
     sniper_confidence = clamp(confidence + sniper_bonus, 0.0, 10.0)
 
@@ -164,7 +190,7 @@ def decide_from_factors(symbol: str, profile, factors: Dict) -> Decision:
         "structure_ok_continuation": bool(structure_ok_cont),
         "entry_confirm_type_sniper": entry_type_sniper,
         "entry_confirm_type_continuation": entry_type_cont,
-        "cisd_confirmed": bool(factors.get("cisd_confirmed", False)),
+        "cisd_confirmed": bool(get("cisd_confirmed", False)),
         "distribution_bonus": float(score_breakdown.get("distribution_bonus", 0.0)),
         # debug visibility:
         "sniper_clean": bool(sniper_clean),
@@ -205,13 +231,7 @@ def decide_from_factors(symbol: str, profile, factors: Dict) -> Decision:
     # ✅ Use sniper_confidence ONLY here
     if sniper_ready and sniper_confidence >= EXECUTION_CONFIDENCE_MIN:
         action = "BUY NOW" if po3_bias == "bullish" else "SELL NOW"
-        trade_plan = {
-            "entry": factors.get("entry", "TBD"),
-            "stop": factors.get("stop", "TBD"),
-            "tp1": factors.get("tp1", "TBD"),
-            "tp2": factors.get("tp2", "TBD"),
-            "rr": rr,
-        }
+        trade_plan = _trade_plan(factors, rr)
         meta = {**base_meta, "setup_type": "SNIPER", "entry_confirm_type": entry_type_sniper}
         bonus_tag = " + clean bonus" if sniper_bonus > 0 else ""
         return Decision(
@@ -244,13 +264,7 @@ def decide_from_factors(symbol: str, profile, factors: Dict) -> Decision:
     # ✅ Continuation uses base confidence threshold (6.5)
     if continuation_ready and confidence >= SETUP_SCORE_THRESHOLD:
         action = "BUY NOW" if po3_bias == "bullish" else "SELL NOW"
-        trade_plan = {
-            "entry": factors.get("entry", "TBD"),
-            "stop": factors.get("stop", "TBD"),
-            "tp1": factors.get("tp1", "TBD"),
-            "tp2": factors.get("tp2", "TBD"),
-            "rr": rr,
-        }
+        trade_plan = _trade_plan(factors, rr)
 
         htf_tag = " (HTF aligned)" if htf_alignment else " (HTF not aligned)"
         meta = {**base_meta, "setup_type": "CONTINUATION", "entry_confirm_type": entry_type_cont}